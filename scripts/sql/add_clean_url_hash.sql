@@ -0,0 +1,15 @@
+-- Unique hash of the clean_url of the articles, see init_news_batch in webapp/auto_kmdb/db.py
+-- clean_url is too long for a unique index, so the md5 of the lowercased url is indexed instead
+-- (lowercased to follow the case insensitive collation of clean_url). Inserting an existing url
+-- is skipped by ON DUPLICATE KEY UPDATE, which closes the race between checking and inserting a url.
+
+ALTER TABLE autokmdb_news ADD clean_url_hash BINARY(16) NULL;
+
+-- only the first article of each url gets the hash, older duplicates are kept with NULL
+UPDATE autokmdb_news n
+    JOIN (SELECT MIN(id) AS id FROM autokmdb_news GROUP BY clean_url) f ON n.id = f.id
+    SET n.clean_url_hash = UNHEX(MD5(LOWER(n.clean_url))), n.mod_time = n.mod_time;
+
+CREATE UNIQUE INDEX uq_news_clean_url_hash ON autokmdb_news (clean_url_hash);
+
+-- mysql -h 127.0.0.1 -P 9999 -u autokmdb -p autokmdb --skip_ssl < add_clean_url_hash.sql
@@ -0,0 +1,45 @@
+-- Daily rollup of the article statuses by newspaper, read by get_articles_by_day in
+-- webapp/auto_kmdb/db.py instead of grouping the whole autokmdb_news table. The rows of a day
+-- and newspaper are recounted by refresh_daily_stats after the keyword step and the annotations.
+-- Articles without a newspaper are counted under newspaper_id 0. Running the backfill again
+-- recounts every row.
+
+CREATE TABLE IF NOT EXISTS autokmdb_daily_stats (
+    date DATE NOT NULL,
+    newspaper_id INT NOT NULL,
+    count_positive INT NOT NULL DEFAULT 0,
+    count_negative_0 INT NOT NULL DEFAULT 0,
+    count_negative_1 INT NOT NULL DEFAULT 0,
+    count_negative_2 INT NOT NULL DEFAULT 0,
+    count_negative_3 INT NOT NULL DEFAULT 0,
+    count_negative_100 INT NOT NULL DEFAULT 0,
+    count_todo INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, newspaper_id)
+);
+
+INSERT INTO autokmdb_daily_stats (date, newspaper_id, count_positive, count_negative_0,
+    count_negative_1, count_negative_2, count_negative_3, count_negative_100, count_todo)
+SELECT
+    DATE(article_date),
+    COALESCE(newspaper_id, 0),
+    COUNT(CASE WHEN processing_step = 5 AND annotation_label = 1 THEN 1 END),
+    COUNT(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 0 THEN 1 END),
+    COUNT(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 1 THEN 1 END),
+    COUNT(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 2 THEN 1 END),
+    COUNT(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 3 THEN 1 END),
+    COUNT(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 100 THEN 1 END),
+    COUNT(CASE WHEN classification_label = 1 AND processing_step = 4 AND annotation_label IS NULL
+        AND COALESCE(skip_reason, 0) = 0 THEN 1 END)
+FROM autokmdb_news
+WHERE article_date IS NOT NULL
+GROUP BY DATE(article_date), COALESCE(newspaper_id, 0)
+ON DUPLICATE KEY UPDATE
+    count_positive = VALUES(count_positive),
+    count_negative_0 = VALUES(count_negative_0),
+    count_negative_1 = VALUES(count_negative_1),
+    count_negative_2 = VALUES(count_negative_2),
+    count_negative_3 = VALUES(count_negative_3),
+    count_negative_100 = VALUES(count_negative_100),
+    count_todo = VALUES(count_todo);
+
+-- mysql -h 127.0.0.1 -P 9999 -u autokmdb -p autokmdb --skip_ssl < add_daily_stats.sql
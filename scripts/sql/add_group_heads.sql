@@ -0,0 +1,14 @@
+-- Materialized head of each article group, see _update_group_head in webapp/auto_kmdb/db.py
+-- get_articles lists a group by its head, the article with the smallest id of the group. The
+-- flag is kept up to date by add_article_group, add_article_to_group and pick_out_article.
+
+ALTER TABLE autokmdb_news ADD is_group_head BOOL NOT NULL DEFAULT FALSE;
+
+UPDATE autokmdb_news n
+    JOIN (SELECT MIN(id) AS id FROM autokmdb_news WHERE group_id IS NOT NULL GROUP BY group_id) h
+        ON n.id = h.id
+    SET n.is_group_head = TRUE, n.mod_time = n.mod_time;
+
+CREATE INDEX idx_news_group_head ON autokmdb_news (is_group_head, group_id);
+
+-- mysql -h 127.0.0.1 -P 9999 -u autokmdb -p autokmdb --skip_ssl < add_group_heads.sql
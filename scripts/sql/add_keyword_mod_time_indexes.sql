@@ -0,0 +1,8 @@
+-- The entity linking keyword store polls the keyword tables for rows modified since its last
+-- poll, see KeywordStore in webapp/auto_kmdb/utils/entity_linking.py
+
+CREATE INDEX idx_news_persons_mod_time ON news_persons (mod_time);
+CREATE INDEX idx_news_institutions_mod_time ON news_institutions (mod_time);
+CREATE INDEX idx_news_places_mod_time ON news_places (mod_time);
+
+-- mysql -h 127.0.0.1 -P 9999 -u autokmdb -p autokmdb --skip_ssl < add_keyword_mod_time_indexes.sql
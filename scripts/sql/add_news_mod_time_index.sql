@@ -0,0 +1,6 @@
+-- The search indexer polls the articles modified since its last poll, see search_indexer in
+-- webapp/auto_kmdb/search_indexer.py
+
+CREATE INDEX idx_news_mod_time ON autokmdb_news (mod_time);
+
+-- mysql -h 127.0.0.1 -P 9999 -u autokmdb -p autokmdb --skip_ssl < add_news_mod_time_index.sql
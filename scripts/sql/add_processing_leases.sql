@@ -0,0 +1,12 @@
+-- Lease columns for claiming queue rows, see get_step_queue in webapp/auto_kmdb/db.py
+-- A row of the download/classification/ner/keyword queue is processed by the worker in
+-- lease_owner until lease_expires, after that other workers may claim it again.
+
+ALTER TABLE autokmdb_news ADD lease_owner VARCHAR(128) NULL;
+ALTER TABLE autokmdb_news ADD lease_expires DATETIME NULL;
+
+-- claiming filters on the step and the expiry, the claimed batch is read back by owner
+CREATE INDEX idx_news_step_lease ON autokmdb_news (processing_step, lease_expires);
+CREATE INDEX idx_news_lease_owner ON autokmdb_news (lease_owner);
+
+-- mysql -h 127.0.0.1 -P 9999 -u autokmdb -p autokmdb --skip_ssl < add_processing_leases.sql
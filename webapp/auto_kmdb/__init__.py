@@ -4,19 +4,26 @@ load_dotenv("data/.env")
 from flask import Flask
 from threading import Thread
 from time import sleep
+import os
+
+# set by command line tools (e.g. auto_kmdb.reextract) that only need the modules of the package
+NO_APP: bool = os.environ.get("AUTO_KMDB_NO_APP", "0") == "1"
 
-sleep(10)  # TODO better wait handling
-from auto_kmdb.processors.DownloadProcessor import do_retries
-from auto_kmdb.processors import (
-    Processor,
-    ClassificationProcessor,
-    DownloadProcessor,
-    NERProcessor,
-    KeywordProcessor,
-)
-from auto_kmdb.rss_watcher import rss_watcher
+# the app, the processors and the database are only imported when the app is started, so the
+# parse pool processes and the command line tools can import the modules they need
+if not NO_APP:
+    sleep(10)  # TODO better wait handling
+    from auto_kmdb.processors.DownloadProcessor import do_retries
+    from auto_kmdb.processors import (
+        Processor,
+        ClassificationProcessor,
+        DownloadProcessor,
+        NERProcessor,
+        KeywordProcessor,
+    )
+    from auto_kmdb.rss_watcher import rss_watcher
+    from auto_kmdb.search_indexer import search_indexer
 import logging
-import os
 
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -48,6 +55,7 @@ def create_app() -> Flask:
 
     Thread(target=rss_watcher, args=(app.app_context(),), daemon=True).start()
     Thread(target=do_retries, args=(app.app_context(),), daemon=True).start()
+    Thread(target=search_indexer, args=(app.app_context(),), daemon=True).start()
 
     processors: list[Processor] = [
         DownloadProcessor(),
@@ -61,4 +69,5 @@ def create_app() -> Flask:
     return app
 
 
-app = create_app()
+if not NO_APP:
+    app = create_app()
@@ -1,5 +1,6 @@
-from auto_kmdb import app
-from waitress import serve
-
 if __name__ == "__main__":
+    # imported here, so processes started by multiprocessing don't start the app again
+    from auto_kmdb import app
+    from waitress import serve
+
     serve(app, host="0.0.0.0", port=8000)
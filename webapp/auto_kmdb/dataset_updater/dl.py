@@ -4,30 +4,34 @@ import gzip
 import json
 import requests
 from tqdm import tqdm
+from auto_kmdb.utils.html_archive import get_html_archive
+
 
 def download_htmls():
     ds = load_dataset("K-Monitor/kmdb_classification").shuffle(seed=42)
 
     urls = ds["train"]["url"]
 
-    output_file = "data/data.jsonl.gz"
-    downloaded_urls = set()
+    archive = get_html_archive()
+
+    for url in tqdm(urls):
+        if archive.has(url):
+            continue
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            archive.put(url, response.text)
+        except Exception:
+            continue
 
-    # Load already downloaded URLs if the file exists
-    if os.path.exists(output_file):
-        with gzip.open(output_file, 'rt', encoding='utf-8') as f:
-            for line in f:
-                downloaded_urls.add(json.loads(line)["url"])
 
-    with gzip.open(output_file, 'at', encoding='utf-8') as f:
-        for url in tqdm(urls):
-            if url in downloaded_urls:
-                continue
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                html_content = response.text
-                json_record = json.dumps({"url": url, "html": html_content})
-                f.write(json_record + "\n")
-            except Exception:
-                continue
+def import_jsonl_gz(input_file: str = "data/data.jsonl.gz"):
+    """Moves the html downloaded into the old data/data.jsonl.gz file to the html archive."""
+    archive = get_html_archive()
+    if not os.path.exists(input_file):
+        return
+    with gzip.open(input_file, "rt", encoding="utf-8") as f:
+        for line in tqdm(f):
+            data = json.loads(line)
+            if data["html"] and not archive.has(data["url"]):
+                archive.put(data["url"], data["html"])
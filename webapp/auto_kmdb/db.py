@@ -1,12 +1,19 @@
 from functools import cache
+from math import ceil
 from typing import Literal, Any, Optional
 from mysql.connector.pooling import MySQLConnectionPool, PooledMySQLConnection
 import os
+import socket
+import sqlite3
+import threading
+from uuid import uuid4
 from slugify import slugify
 import logging
 from datetime import datetime, timedelta
 from collections import defaultdict
 from cachetools import cached, LRUCache, TTLCache
+from auto_kmdb.utils.search_index import SearchIndex, get_search_index
+from auto_kmdb.utils.step_events import notify_step
 
 connection_pool: MySQLConnectionPool = MySQLConnectionPool(
     pool_name="cnx_pool",
@@ -22,6 +29,24 @@ connection_pool: MySQLConnectionPool = MySQLConnectionPool(
 
 VERSION_NUMBER: int = 0
 
+# leases of claimed queue rows, see get_step_queue
+LEASE_SECONDS: int = int(os.environ.get("LEASE_SECONDS", "1800"))
+WORKER_ID: str = os.environ.get("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+# conditions of the status tabs of the article list
+ARTICLE_STATUS_CONDITIONS: dict[str, str] = {
+    "mixed": "n.classification_label = 1 AND n.processing_step = 4 AND n.annotation_label IS NULL AND COALESCE(n.skip_reason, 0) = 0",
+    "positive": "n.processing_step = 5 AND n.annotation_label = 1",
+    "negative": "n.processing_step = 5 AND n.annotation_label = 0",
+    "processing": "n.processing_step < 4",
+    "all": "n.processing_step >= 0",
+}
+
+# seconds the counts and pages of the article list are cached, annotations clear the cache
+ARTICLE_LIST_CACHE_TTL: int = int(os.environ.get("ARTICLE_LIST_CACHE_TTL", "30"))
+article_list_cache: TTLCache = TTLCache(maxsize=512, ttl=ARTICLE_LIST_CACHE_TTL)
+article_list_cache_lock = threading.Lock()
+
 
 @cached(cache=TTLCache(maxsize=32, ttl=60))
 def get_all(table: str, id_column: str, name_column: str) -> list[dict]:
@@ -142,6 +167,11 @@ def get_all_freq(table: str, id_column: str, name_column: str) -> list[dict]:
     Returns:
         List of dicts, each dict containing the 'name', 'id' and 'count' occurrances of a given label.
     """
+    return query_all_freq(table, id_column, name_column)
+
+
+def query_all_freq(table: str, id_column: str, name_column: str) -> list[dict]:
+    """Uncached version of get_all_freq."""
     query = f'SELECT p.{id_column} AS id, p.{name_column} AS name, COUNT(npl.news_id) AS count FROM {table} p LEFT JOIN {table}_link npl ON p.{id_column} = npl.{id_column} WHERE p.status = "Y" GROUP BY p.{id_column};'
     with connection_pool.get_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
@@ -149,6 +179,72 @@ def get_all_freq(table: str, id_column: str, name_column: str) -> list[dict]:
             return list(cursor.fetchall())
 
 
+def get_label_watermark(table: str, id_column: str) -> tuple[int, int]:
+    """
+    Queries the latest modification time and the largest id of the given label table, labels
+    changed after these can be queried with get_label_changes.
+
+    Args:
+        table: name of the table
+        id_column: name of the column containing the ids
+
+    Returns:
+        Tuple of the largest mod_time and the largest id, 0 for an empty table.
+    """
+    query = f"SELECT MAX(mod_time), MAX({id_column}) FROM {table};"
+    with connection_pool.get_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            max_mod_time, max_id = cursor.fetchone()
+            return int(max_mod_time or 0), int(max_id or 0)
+
+
+def get_label_changes(
+    table: str, id_column: str, name_column: str, min_mod_time: int, min_id: int
+) -> list[dict]:
+    """
+    Queries the labels of the given table that have been modified at or after min_mod_time, or
+    have an id larger than min_id, regardless of their status.
+
+    Args:
+        table: name of the table
+        id_column: name of the column containing the ids
+        name_column: name of the column containing the names
+        min_mod_time: unix timestamp, labels modified in this second are returned again
+        min_id: largest id already seen
+
+    Returns:
+        List of dicts, each dict containing the 'id', 'name', 'status' and 'mod_time' of a label.
+    """
+    query = f"SELECT {id_column} AS id, {name_column} AS name, status, mod_time FROM {table} WHERE mod_time >= %s OR {id_column} > %s ORDER BY {id_column};"
+    with connection_pool.get_connection() as connection:
+        with connection.cursor(dictionary=True) as cursor:
+            cursor.execute(query, (min_mod_time, min_id))
+            return list(cursor.fetchall())
+
+
+def get_label_counts(table: str, id_column: str, ids: list[int]) -> dict[int, int]:
+    """
+    Counts the number of times the given labels have been used on an article.
+
+    Args:
+        table: name of the table
+        id_column: name of the column containing the ids
+        ids: ids of the labels to count
+
+    Returns:
+        Dict of label id to count, labels that have never been used are missing.
+    """
+    if not ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(ids))
+    query = f"SELECT {id_column}, COUNT(news_id) FROM {table}_link WHERE {id_column} IN ({placeholders}) GROUP BY {id_column};"
+    with connection_pool.get_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(query, tuple(ids))
+            return {label_id: count for label_id, count in cursor.fetchall()}
+
+
 def get_all_persons_freq() -> list[dict]:
     """
     Queries person label id-name pairs and counts the number of times the given person label has
@@ -208,10 +304,13 @@ def process_and_accept_article(
     id: int,
     user_id: int,
 ) -> None:
-    query = """UPDATE autokmdb_news SET processing_step = 2, skip_reason = NULL, mod_id = %s, source = 1, classification_label = 1 WHERE id = %s;"""
+    query = """UPDATE autokmdb_news SET processing_step = 2, skip_reason = NULL, mod_id = %s, source = 1, classification_label = 1, lease_owner = NULL, lease_expires = NULL WHERE id = %s;"""
     with connection.cursor() as cursor:
         cursor.execute(query, (user_id, id))
     connection.commit()
+    clear_article_list_cache()
+    refresh_daily_stats(connection, [id])
+    notify_step(2)
 
 
 def init_news(
@@ -223,7 +322,45 @@ def init_news(
     newspaper_id: int,
     user_id: Optional[int],
     pub_time: Optional[str],
-) -> None:
+) -> bool:
+    """
+    Inserts a new article into the download queue, see init_news_batch.
+
+    Returns:
+        Whether the article has been inserted, False if its clean_url already exists.
+    """
+    article: dict = {
+        "source_url": source_url,
+        "clean_url": clean_url,
+        "newspaper_name": newspaper_name,
+        "newspaper_id": newspaper_id,
+        "pub_time": pub_time,
+    }
+    return init_news_batch(connection, source, [article], user_id) == 1
+
+
+def init_news_batch(
+    connection: PooledMySQLConnection,
+    source: str,
+    articles: list[dict],
+    user_id: Optional[int],
+) -> int:
+    """
+    Inserts new articles into the download queue with a single multi-row INSERT and commit.
+    Articles whose clean_url already exists are skipped by the unique clean_url_hash index, so
+    concurrent inserts of the same url can't create duplicates. Other errors of a row (e.g. a too
+    long url or an invalid date) are not ignored and fail the whole batch.
+
+    Args:
+        source: "rss", "manual" or "api"
+        articles: dicts with source_url, clean_url, newspaper_name, newspaper_id and pub_time
+        user_id: id of the user adding the articles, optional
+
+    Returns:
+        The number of inserted articles.
+    """
+    if not articles:
+        return 0
     source_value = 0
     if source == "manual":
         source_value = 1
@@ -231,26 +368,36 @@ def init_news(
         source_value = 2
     current_datetime: datetime = datetime.now()
     cre_time: str = current_datetime.strftime("%Y-%m-%d %H:%M:%S")
+    values: list[Any] = []
+    for article in articles:
+        values += [
+            source_value,
+            article["source_url"],
+            article["clean_url"],
+            article["clean_url"],
+            0,
+            cre_time,
+            article["pub_time"],
+            article["newspaper_name"],
+            article["newspaper_id"],
+            VERSION_NUMBER,
+            user_id,
+        ]
+    # the hash matches the case insensitive collation of clean_url, see add_clean_url_hash.sql
+    row: str = "(%s, %s, %s, UNHEX(MD5(LOWER(%s))), %s, %s, %s, %s, %s, %s, %s)"
     with connection.cursor(dictionary=True) as cursor:
-        query = """INSERT INTO autokmdb_news
-                (source, source_url, clean_url, processing_step, cre_time, article_date, newspaper_name, newspaper_id, version_number, mod_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-        cursor.execute(
-            query,
-            (
-                source_value,
-                source_url,
-                clean_url,
-                0,
-                cre_time,
-                pub_time,
-                newspaper_name,
-                newspaper_id,
-                VERSION_NUMBER,
-                user_id,
-            ),
-        )
+        # unlike INSERT IGNORE, the no-op update skips only the duplicate keys, and a row left
+        # unchanged counts as 0 affected rows (the pool doesn't set the FOUND_ROWS client flag)
+        query = f"""INSERT INTO autokmdb_news
+                (source, source_url, clean_url, clean_url_hash, processing_step, cre_time, article_date, newspaper_name, newspaper_id, version_number, mod_id)
+                VALUES {", ".join([row] * len(articles))}
+                ON DUPLICATE KEY UPDATE id = id"""
+        cursor.execute(query, values)
+        inserted: int = cursor.rowcount
     connection.commit()
+    if inserted > 0:
+        notify_step(0)
+    return inserted
 
 
 def url_exists_in_kmdb(connection: PooledMySQLConnection, url: str) -> bool:
@@ -271,6 +418,31 @@ def check_url_exists(connection: PooledMySQLConnection, url: str) -> bool:
         return len(results) != 0
 
 
+def get_existing_urls(
+    connection: PooledMySQLConnection, urls: list[str]
+) -> set[str]:
+    """
+    Returns which of the clean urls are already in autokmdb_news, with a single query.
+    """
+    if not urls:
+        return set()
+    with connection.cursor() as cursor:
+        query = f"""SELECT clean_url FROM autokmdb_news
+            WHERE clean_url IN ({", ".join(["%s"] * len(urls))})"""
+        cursor.execute(query, urls)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def get_recent_urls(connection: PooledMySQLConnection, limit: int) -> list[str]:
+    """
+    Returns the clean urls of the latest limit articles, oldest first.
+    """
+    with connection.cursor() as cursor:
+        query = "SELECT clean_url FROM autokmdb_news ORDER BY id DESC LIMIT %s"
+        cursor.execute(query, (limit,))
+        return [row[0] for row in reversed(cursor.fetchall())]
+
+
 def add_auto_person(
     connection: PooledMySQLConnection,
     autokmdb_news_id: int,
@@ -419,6 +591,142 @@ def add_auto_files(
     connection.commit()
 
 
+def get_articles_for_reextraction(
+    connection: PooledMySQLConnection,
+    after_id: int,
+    limit: int,
+    newspaper_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> list[dict]:
+    """
+    Queries the next batch of downloaded articles whose title, description and text can be
+    extracted again from the archived html. Annotated and paywalled articles are left out, their
+    content has been checked by a human or fetched from a separate api.
+
+    Args:
+        connection: database connection
+        after_id: only articles with a larger id are returned, for paging through the table
+        limit: maximum number of articles
+        newspaper_id: only articles of this newspaper, optional
+        date_from: only articles added on or after this date (YYYY-MM-DD), optional
+        date_to: only articles added before this date (YYYY-MM-DD), optional
+
+    Returns:
+        List of dicts, each containing 'id', 'clean_url', 'source_url', 'newspaper_id',
+        'article_date', 'title', 'description' and 'text', ordered by id.
+    """
+    query = """SELECT id, clean_url, source_url, newspaper_id, article_date, title, description, text
+        FROM autokmdb_news
+        WHERE id > %s AND processing_step > 0 AND annotation_label IS NULL
+        AND (is_paywalled IS NULL OR is_paywalled = 0)"""
+    params: list = [after_id]
+    if newspaper_id is not None:
+        query += " AND newspaper_id = %s"
+        params.append(newspaper_id)
+    if date_from is not None:
+        query += " AND cre_time >= %s"
+        params.append(date_from)
+    if date_to is not None:
+        query += " AND cre_time < %s"
+        params.append(date_to)
+    query += " ORDER BY id LIMIT %s"
+    params.append(limit)
+    with connection.cursor(dictionary=True) as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+SEARCH_INDEX_COLUMNS: str = "id, title, description, source_url, newspaper_id, article_date"
+
+
+def get_news_watermark(connection: PooledMySQLConnection) -> datetime:
+    """
+    Queries the latest modification time of the articles, articles changed at or after it can be
+    queried with get_news_search_changes.
+
+    Returns:
+        The largest mod_time, datetime.min for an empty table.
+    """
+    query = "SELECT MAX(mod_time) FROM autokmdb_news"
+    with connection.cursor() as cursor:
+        cursor.execute(query)
+        max_mod_time = cursor.fetchone()[0]
+        return max_mod_time or datetime.min
+
+
+def get_news_for_search_index(
+    connection: PooledMySQLConnection, after_id: int, limit: int
+) -> list[dict]:
+    """
+    Queries the next batch of articles for the full-text search index, ordered by id.
+
+    Args:
+        connection: database connection
+        after_id: only articles with a larger id are returned, for paging through the table
+        limit: maximum number of articles
+
+    Returns:
+        List of dicts, each containing the columns of SEARCH_INDEX_COLUMNS.
+    """
+    query = f"SELECT {SEARCH_INDEX_COLUMNS} FROM autokmdb_news WHERE id > %s ORDER BY id LIMIT %s"
+    with connection.cursor(dictionary=True) as cursor:
+        cursor.execute(query, (after_id, limit))
+        return cursor.fetchall()
+
+
+def get_news_search_changes(
+    connection: PooledMySQLConnection,
+    after_mod_time: datetime,
+    after_id: int,
+    limit: int,
+    lag: int,
+) -> list[dict]:
+    """
+    Queries the next batch of articles added or modified after a position in (mod_time, id)
+    order, for the search index.
+
+    Args:
+        connection: database connection
+        after_mod_time: mod_time of the last article of the previous batch
+        after_id: id of the last article of the previous batch
+        limit: maximum number of articles
+        lag: articles modified in the last lag seconds are left for a later batch, so rows of
+            transactions committed late are not skipped
+
+    Returns:
+        List of dicts ordered by mod_time and id, each containing the columns of
+        SEARCH_INDEX_COLUMNS and 'mod_time'.
+    """
+    query = f"""SELECT {SEARCH_INDEX_COLUMNS}, mod_time FROM autokmdb_news
+        WHERE mod_time >= %s AND (mod_time > %s OR id > %s)
+            AND mod_time < NOW() - INTERVAL %s SECOND
+        ORDER BY mod_time, id LIMIT %s"""
+    with connection.cursor(dictionary=True) as cursor:
+        cursor.execute(query, (after_mod_time, after_mod_time, after_id, lag, limit))
+        return cursor.fetchall()
+
+
+def save_reextracted_articles(
+    connection: PooledMySQLConnection, articles: list[tuple[str, str, str, int]]
+) -> None:
+    """
+    Writes back the title, description and text of re-extracted articles in a single transaction.
+    Articles annotated in the meantime are not changed, neither is their mod_time.
+
+    Args:
+        connection: database connection
+        articles: list of (title, description, text, id) tuples
+    """
+    if not articles:
+        return
+    query = """UPDATE autokmdb_news SET title = %s, description = %s, text = %s, mod_time = mod_time
+        WHERE id = %s AND annotation_label IS NULL;"""
+    with connection.cursor() as cursor:
+        cursor.executemany(query, articles)
+    connection.commit()
+
+
 def save_download_step(
     connection: PooledMySQLConnection,
     id: int,
@@ -437,13 +745,16 @@ def save_download_step(
                 skip_reason = NULL, 
                 author = %s, 
                 article_date = COALESCE(%s, article_date),
-                is_paywalled = %s
+                is_paywalled = %s,
+                lease_owner = NULL,
+                lease_expires = NULL
             WHERE id = %s;"""
     with connection.cursor(dictionary=True) as cursor:
         cursor.execute(
             query, (text, title, description, authors, date, is_paywalled, id)
         )
     connection.commit()
+    notify_step(1)
 
 
 def skip_same_news(
@@ -456,17 +767,18 @@ def skip_same_news(
     date: Optional[str],
     is_paywalled: int,
 ) -> None:
-    query = """UPDATE autokmdb_news SET skip_reason = 2, processing_step = 5, text = %s, title = %s, description = %s, processing_step = 1, author = %s, article_date = COALESCE(%s, article_date), is_paywalled = %s
+    query = """UPDATE autokmdb_news SET skip_reason = 2, processing_step = 5, text = %s, title = %s, description = %s, processing_step = 1, author = %s, article_date = COALESCE(%s, article_date), is_paywalled = %s, lease_owner = NULL, lease_expires = NULL
                WHERE id = %s"""
     with connection.cursor(dictionary=True) as cursor:
         cursor.execute(
             query, (text, title, description, authors, date, is_paywalled, id)
         )
     connection.commit()
+    notify_step(1)
 
 
 def skip_download_error(connection: PooledMySQLConnection, id: int) -> None:
-    query = """UPDATE autokmdb_news SET skip_reason = 3, processing_step = 5
+    query = """UPDATE autokmdb_news SET skip_reason = 3, processing_step = 5, lease_owner = NULL, lease_expires = NULL
                WHERE id = %s"""
     with connection.cursor(dictionary=True) as cursor:
         cursor.execute(query, (id,))
@@ -474,7 +786,7 @@ def skip_download_error(connection: PooledMySQLConnection, id: int) -> None:
 
 
 def skip_processing_error(connection: PooledMySQLConnection, id: int) -> None:
-    query = """UPDATE autokmdb_news SET skip_reason = 4, processing_step = 5
+    query = """UPDATE autokmdb_news SET skip_reason = 4, processing_step = 5, lease_owner = NULL, lease_expires = NULL
                WHERE id = %s"""
     with connection.cursor(dictionary=True) as cursor:
         cursor.execute(query, (id,))
@@ -492,24 +804,52 @@ def save_classification_step(
     if classification_label == 0:
         new_step = 5
     query = """UPDATE autokmdb_news SET classification_label = %s,
-               classification_score = %s, processing_step = %s, category = %s WHERE id = %s"""
+               classification_score = %s, processing_step = %s, category = %s,
+               lease_owner = NULL, lease_expires = NULL WHERE id = %s"""
     with connection.cursor() as cursor:
         cursor.execute(
             query, (classification_label, classification_score, new_step, category, id)
         )
     connection.commit()
+    notify_step(new_step)
 
 
 def get_retries_from(connection: PooledMySQLConnection, date: str) -> list[dict]:
-    query = """SELECT id, source_url AS url, source, newspaper_id FROM autokmdb_news WHERE skip_reason = 3 AND cre_time >= %s AND processing_step = 5 ORDER BY source DESC, mod_time DESC"""
+    query = """SELECT id, source_url AS url, clean_url, source, newspaper_id FROM autokmdb_news WHERE skip_reason = 3 AND cre_time >= %s AND processing_step = 5 ORDER BY source DESC, mod_time DESC"""
     with connection.cursor(dictionary=True) as cursor:
         cursor.execute(query, (date,))
         return cursor.fetchall()
 
 
+def get_worker_id() -> str:
+    """
+    Identifies the calling worker thread, used as the owner of the leases it claims.
+
+    Returns:
+        String of the form 'host:pid:thread'.
+    """
+    return f"{WORKER_ID}:{threading.get_ident()}"
+
+
 def get_step_queue(
-    connection: PooledMySQLConnection, step: int
+    connection: PooledMySQLConnection, step: int, claim: bool = True
 ) -> list[dict[str, Any]]:
+    """
+    Returns the next batch of articles waiting in the given processing_step.
+
+    When claim is set, the rows are atomically leased to the calling worker for LEASE_SECONDS,
+    so other workers (threads, processes or hosts) processing the same step skip them. The lease
+    is released when the article is moved to another step, if the worker crashes it expires and
+    the rows are claimed again by another worker.
+
+    Args:
+        connection: database connection
+        step: processing_step of the queue
+        claim: whether to lease the returned rows to the calling worker
+
+    Returns:
+        List of dicts, containing the 'id' and the fields needed for the given step.
+    """
     process_old = int(os.environ.get("PROCESS_OLD", "0")) == 1
     process_old_user_id = os.environ.get("PROCESS_OLD_USER_ID", None)
     fields: dict[int, str] = {
@@ -519,24 +859,47 @@ def get_step_queue(
         3: "text",
         4: "text",
     }
-    
+    order = " ORDER BY source DESC, article_date ASC, mod_time ASC"
+
     # Build the query with proper parameterization
-    query = f"SELECT id, {fields[step]} FROM autokmdb_news WHERE processing_step = %s"
+    condition = "processing_step = %s"
     params = [step]
-    
+
     # Add user filter if specified
     if process_old_user_id is not None:
         user_id = int(process_old_user_id)
         if process_old:
-            query += " AND mod_id = %s"
+            condition += " AND mod_id = %s"
         else:
-            query += " AND (mod_id != %s OR mod_id IS NULL)"
+            condition += " AND (mod_id != %s OR mod_id IS NULL)"
         params.append(user_id)
-    
-    query += " ORDER BY source DESC, article_date ASC, mod_time ASC LIMIT 50"
-    
+
+    if not claim:
+        query = f"SELECT id, {fields[step]} FROM autokmdb_news WHERE {condition}{order} LIMIT 50"
+        with connection.cursor(dictionary=True) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    # every claim gets its own token, so rows left over from a previous batch of the same worker
+    # (e.g. after an exception) are only retried once their lease expires
+    lease_owner: str = f"{get_worker_id()}:{uuid4().hex[:8]}"
+    claim_query = f"""UPDATE autokmdb_news
+            SET lease_owner = %s,
+                lease_expires = NOW() + INTERVAL %s SECOND,
+                mod_time = mod_time
+            WHERE {condition} AND (lease_expires IS NULL OR lease_expires < NOW())
+            {order} LIMIT 50"""
+    query = f"SELECT id, {fields[step]} FROM autokmdb_news WHERE lease_owner = %s AND processing_step = %s{order}"
+
     with connection.cursor(dictionary=True) as cursor:
-        cursor.execute(query, params)
+        cursor.execute(claim_query, [lease_owner, LEASE_SECONDS] + params)
+        claimed: int = cursor.rowcount
+    connection.commit()
+    if claimed == 0:
+        return []
+
+    with connection.cursor(dictionary=True) as cursor:
+        cursor.execute(query, (lease_owner, step))
         return cursor.fetchall()
 
 
@@ -557,34 +920,107 @@ def get_keyword_queue(connection: PooledMySQLConnection) -> list[dict[str, Any]]
 
 
 def get_human_queue(connection: PooledMySQLConnection) -> list[dict[str, Any]]:
-    return get_step_queue(connection, 4)
+    return get_step_queue(connection, 4, claim=False)
+
+
+# counted columns of autokmdb_daily_stats, the articles of a day and newspaper by status
+DAILY_STATS_COLUMNS: dict[str, str] = {
+    "count_positive": "processing_step = 5 AND annotation_label = 1",
+    "count_negative_0": "processing_step = 5 AND annotation_label = 0 AND negative_reason = 0",
+    "count_negative_1": "processing_step = 5 AND annotation_label = 0 AND negative_reason = 1",
+    "count_negative_2": "processing_step = 5 AND annotation_label = 0 AND negative_reason = 2",
+    "count_negative_3": "processing_step = 5 AND annotation_label = 0 AND negative_reason = 3",
+    "count_negative_100": "processing_step = 5 AND annotation_label = 0 AND negative_reason = 100",
+    "count_todo": "classification_label = 1 AND processing_step = 4 AND annotation_label IS NULL AND COALESCE(skip_reason, 0) = 0",
+}
+
+
+def refresh_daily_stats(connection: PooledMySQLConnection, ids: list[int]) -> None:
+    """
+    Recounts the rows of autokmdb_daily_stats of the days and newspapers of the given articles.
+    Called after the changes that can move an article into or out of a counted status: the
+    keyword step and the annotations. The rows are recounted instead of incremented, so a missed
+    or repeated refresh doesn't leave a lasting error.
+
+    Args:
+        connection: database connection
+        ids: autokmdb ids of the changed articles
+    """
+    if not ids:
+        return
+    counts: str = ", ".join(
+        f"COUNT(CASE WHEN {condition} THEN 1 END)"
+        for condition in DAILY_STATS_COLUMNS.values()
+    )
+    updates: str = ", ".join(
+        f"{column} = VALUES({column})" for column in DAILY_STATS_COLUMNS
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""SELECT DISTINCT DATE(article_date), newspaper_id FROM autokmdb_news
+                WHERE id IN ({', '.join(['%s'] * len(ids))}) AND article_date IS NOT NULL""",
+                ids,
+            )
+            for date, newspaper_id in cursor.fetchall():
+                newspaper_condition = (
+                    "newspaper_id = %s" if newspaper_id is not None else "newspaper_id IS NULL"
+                )
+                params: list[Any] = [date, newspaper_id or 0]
+                if newspaper_id is not None:
+                    params.append(newspaper_id)
+                params += [date, date]
+                cursor.execute(
+                    f"""INSERT INTO autokmdb_daily_stats (date, newspaper_id, {', '.join(DAILY_STATS_COLUMNS)})
+                    SELECT %s, %s, {counts} FROM autokmdb_news
+                    WHERE {newspaper_condition}
+                        AND article_date >= %s AND article_date < %s + INTERVAL 1 DAY
+                    ON DUPLICATE KEY UPDATE {updates}""",
+                    params,
+                )
+        connection.commit()
+    except Exception as e:
+        logging.error(f"Error refreshing daily stats of {ids}: {e}")
 
 
-@cached(cache=TTLCache(maxsize=32, ttl=3600))
 def get_articles_by_day(
-    newspaper_id: Optional[int] = None
+    newspaper_id: Optional[int] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
 ) -> list[dict]:
-    newspaper_condition = "WHERE newspaper_id = %s" if newspaper_id else ""
-    params = [newspaper_id] if newspaper_id else []
-    
+    """
+    Returns the number of articles of each day by status, from the daily rollup table
+    autokmdb_daily_stats (see refresh_daily_stats and scripts/sql/add_daily_stats.sql).
+
+    Args:
+        newspaper_id: only the articles of this newspaper, optional
+        start: first day (YYYY-MM-DD), optional
+        end: last day (YYYY-MM-DD), optional
+
+    Returns:
+        List of dicts of the days in order, with the 'date', the counts of the statuses and their
+        'total_count'.
+    """
+    conditions: list[str] = []
+    params: list[Any] = []
+    if newspaper_id:
+        conditions.append("newspaper_id = %s")
+        params.append(newspaper_id)
+    if start:
+        conditions.append("date >= %s")
+        params.append(start)
+    if end:
+        conditions.append("date <= %s")
+        params.append(end)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
     with connection_pool.get_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
-            # Single optimized query using conditional aggregation
             query = f"""
-                SELECT 
-                    DATE(article_date) AS date,
-                    COUNT(*) AS total_count,
-                    SUM(CASE WHEN processing_step = 5 AND annotation_label = 1 THEN 1 ELSE 0 END) AS count_positive,
-                    SUM(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 0 THEN 1 ELSE 0 END) AS count_negative_0,
-                    SUM(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 1 THEN 1 ELSE 0 END) AS count_negative_1,
-                    SUM(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 2 THEN 1 ELSE 0 END) AS count_negative_2,
-                    SUM(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 3 THEN 1 ELSE 0 END) AS count_negative_3,
-                    SUM(CASE WHEN processing_step = 5 AND annotation_label = 0 AND negative_reason = 100 THEN 1 ELSE 0 END) AS count_negative_100,
-                    SUM(CASE WHEN classification_label = 1 AND processing_step = 4 
-                             AND annotation_label IS NULL AND COALESCE(skip_reason, 0) = 0 THEN 1 ELSE 0 END) AS count_todo
-                FROM autokmdb_news 
-                {newspaper_condition}
-                GROUP BY DATE(article_date)
+                SELECT date, {', '.join(f'SUM({column}) AS {column}' for column in DAILY_STATS_COLUMNS)}
+                FROM autokmdb_daily_stats
+                {where_clause}
+                GROUP BY date
                 ORDER BY date
             """
             
@@ -594,6 +1030,10 @@ def get_articles_by_day(
             # Calculate derived fields
             final_results = []
             for row in results:
+                row = {
+                    column: int(value) if column != "date" else value
+                    for column, value in row.items()
+                }
                 count_negative = (row["count_negative_0"] + row["count_negative_1"] + 
                                 row["count_negative_2"] + row["count_negative_3"] + 
                                 row["count_negative_100"])
@@ -657,6 +1097,7 @@ UPDATE autokmdb_news SET group_id = %s WHERE id = %s;
 """
     with connection.cursor() as cursor:
         cursor.execute(query_set_group_id, (group_id, autokmdb_id))
+        _update_group_head(cursor, group_id)
     connection.commit()
 
     return rowid
@@ -675,20 +1116,39 @@ UPDATE autokmdb_news SET group_id = %s WHERE id = %s;
 """
     with connection.cursor() as cursor:
         cursor.execute(query_set_group_id, (group_id, autokmdb_id))
+        _update_group_head(cursor, group_id)
     connection.commit()
 
 
 def pick_out_article(connetion, autokmdb_id, user_id):
     query = """
-UPDATE autokmdb_news SET source = 1, group_id = NULL, mod_id = %s WHERE id = %s;
+UPDATE autokmdb_news SET source = 1, group_id = NULL, is_group_head = FALSE, mod_id = %s WHERE id = %s;
 """
     query_remove_from_group = """
 DELETE FROM autokmdb_news_groups WHERE autokmdb_news_id = %s;
     """
+    group_id = find_group_by_autokmdb_id(connetion, autokmdb_id)
     with connetion.cursor() as cursor:
         cursor.execute(query, (user_id, autokmdb_id))
         cursor.execute(query_remove_from_group, (autokmdb_id,))
+        if group_id is not None:
+            _update_group_head(cursor, group_id)
     connetion.commit()
+    clear_article_list_cache()
+
+
+def _update_group_head(cursor, group_id: int) -> None:
+    """
+    Marks the article with the smallest id of the group as its head, the article listed for the
+    whole group by get_articles, and unmarks the other articles of the group.
+    """
+    query = """
+UPDATE autokmdb_news n
+JOIN (SELECT MIN(id) AS head_id FROM autokmdb_news WHERE group_id = %s) h
+SET n.is_group_head = (n.id = h.head_id), n.mod_time = n.mod_time
+WHERE n.group_id = %s;
+"""
+    cursor.execute(query, (group_id, group_id))
 
 
 def find_article_by_url_with_group(
@@ -1165,12 +1625,11 @@ def get_article_counts(
     """
         search_tuple = (cleaned_url,)
     else:
-        search_condition = """
-        AND (n.title LIKE %s OR n.description LIKE %s OR n.source_url LIKE %s)
-    """
-        search_tuple = (
-            (search_query, search_query, search_query) if search_query != "%%" else ()
+        text_condition, text_params = _build_search_condition(
+            search_query, domains, start, end
         )
+        search_condition = f"AND {text_condition}" if text_condition else ""
+        search_tuple = tuple(text_params)
 
     date_condition = " AND n.article_date BETWEEN %s AND %s"
 
@@ -1212,39 +1671,177 @@ def get_article_counts(
     return article_counts
 
 
-def _build_search_condition(search_query: str, use_fulltext: bool = False) -> tuple[str, list, bool]:
+def _build_article_filter(
+    domains: list[int],
+    search_query: str,
+    start: str,
+    end: str,
+    is_url_search: bool = False,
+    cleaned_url: str = "",
+) -> tuple[list[str], list[Any], bool]:
     """
-    Build an optimized search condition.
-    Returns (condition_sql, params, is_fulltext)
-    
-    Note: FULLTEXT is disabled by default as MySQL 5.5 has limited FULLTEXT support on InnoDB.
-    If you have upgraded to MySQL 5.6+ with FULLTEXT index on (title, description), 
-    set use_fulltext=True.
+    Builds the conditions of the article list filters except the status and the skip reason:
+    domains, search and dates.
+
+    Args:
+        domains: newspaper ids, [-1] for all
+        search_query: LIKE pattern of the search, the term surrounded by %
+        start: first day of the date filter (YYYY-MM-DD)
+        end: last day of the date filter (YYYY-MM-DD)
+        is_url_search: whether the search is an url, matched exactly
+        cleaned_url: the cleaned url of an url search
+
+    Returns:
+        Tuple of the conditions on the n alias, their params and whether there is a text search.
+    """
+    start = start + " 00:00:00"
+    end = end + " 23:59:59"
+    conditions: list[str] = []
+    params: list[Any] = []
+    has_text_search = False
+
+    # Domain condition
+    if domains and domains[0] != -1 and isinstance(domains, list):
+        domain_list = ",".join([str(domain) for domain in domains])
+        conditions.append(f"n.newspaper_id IN ({domain_list})")
+
+    # Search condition - use different logic for URL searches
+    if is_url_search and cleaned_url:
+        conditions.append("n.source_url = %s")
+        params.append(cleaned_url)
+    elif search_query != "%%" and search_query:
+        has_text_search = True
+        search_condition, search_params = _build_search_condition(
+            search_query, domains, start, end
+        )
+        if search_condition:
+            conditions.append(search_condition)
+            params.extend(search_params)
+
+    # Date condition
+    conditions.append("n.article_date BETWEEN %s AND %s")
+    params.extend([start, end])
+    return conditions, params, has_text_search
+
+
+def _build_search_condition(
+    search_query: str,
+    domains: Optional[list[int]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> tuple[str, list]:
+    """
+    Builds the search condition of the article list: LIKE over the title, description and source
+    url. If possible, the candidates are looked up in the search index first (see
+    utils/search_index.py), so LIKE is only applied to them and to the articles modified since
+    the index was last synced. The index returns a superset of the matches, the results are the
+    same either way.
+
+    Args:
+        search_query: LIKE pattern of the search, the term surrounded by %
+        domains: newspaper ids of the domain filter, optional
+        start: start of the date filter (YYYY-MM-DD HH:MM:SS), optional
+        end: end of the date filter (YYYY-MM-DD HH:MM:SS), optional
+
+    Returns:
+        Tuple of the condition on the n alias and its params, an empty condition for no search.
     """
     # Extract the actual search term from the LIKE pattern
     search_term = search_query.strip('%')
     
     if not search_term:
-        return "", [], False
-    
-    # Use FULLTEXT for searches with 3+ characters (MySQL minimum word length default)
-    # Only if explicitly enabled and FULLTEXT index exists
-    if use_fulltext and len(search_term) >= 3:
-        # FULLTEXT search with BOOLEAN MODE for better control
-        # Using * for prefix matching
-        fulltext_term = f"+{search_term}*"
-        return (
-            "MATCH(n.title, n.description) AGAINST(%s IN BOOLEAN MODE)",
-            [fulltext_term],
-            True
-        )
+        return "", []
+
+    like_condition = "(n.title LIKE %s OR n.description LIKE %s OR n.source_url LIKE %s)"
+    like_params: list = [search_query, search_query, search_query]
+
+    index: Optional[SearchIndex] = get_search_index()
+    if index is not None:
+        try:
+            # read before the ids, an article indexed in between is modified after it
+            synced_mod_time: Optional[str] = index.synced_mod_time
+            ids: Optional[list[int]] = index.search(
+                search_term,
+                domains if domains and domains[0] != -1 else None,
+                start,
+                end,
+            )
+        except sqlite3.Error as e:
+            logging.error(f"Error searching the search index, using LIKE: {e}")
+            ids = None
+        if ids is not None and synced_mod_time is not None:
+            # the articles the index hasn't caught up with yet are searched by LIKE alone
+            id_condition: str = f"n.id IN ({','.join(map(str, ids))}) OR " if ids else ""
+            return (
+                f"({id_condition}n.mod_time >= %s) AND {like_condition}",
+                [synced_mod_time] + like_params,
+            )
+
+    return like_condition, like_params
+
+
+def _article_order(status: str, reverse: bool) -> str:
+    """
+    Returns the ORDER BY clause of the article list. The id makes the order total, so pages can
+    be continued from a cursor.
+    """
+    direction = "ASC" if reverse else "DESC"
+    if status == "positive":
+        return f"main.article_date {direction}, main.id {direction}"
+    return f"main.source DESC, main.article_date {direction}, main.id {direction}"
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a malformed cursor of the article list, see get_articles."""
+
+
+def _article_cursor(article: dict[str, Any]) -> str:
+    """Returns the cursor of the page after the article, see get_articles."""
+    sort_date = article["sort_date"]
+    return f"{article['source']}|{sort_date if sort_date is not None else ''}|{article['id']}"
+
+
+def _articles_after_cursor(
+    status: str, reverse: bool, cursor: str
+) -> tuple[str, list[Any]]:
+    """
+    Returns the condition selecting the articles after the cursor in the order of
+    _article_order, and its params.
+
+    Raises:
+        InvalidCursorError: if the cursor is malformed
+    """
+    try:
+        source_value, date_value, id_value = cursor.split("|")
+        source: int = int(source_value)
+        id: int = int(id_value)
+        if date_value:
+            datetime.fromisoformat(date_value)
+    except (AttributeError, ValueError) as e:
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}") from e
+    date: Optional[str] = date_value or None
+    after: str = ">" if reverse else "<"
+
+    # NULL dates come first in ascending and last in descending order, as the smallest dates
+    if date is None:
+        if reverse:
+            date_condition = "(main.article_date IS NOT NULL OR (main.article_date IS NULL AND main.id > %s))"
+        else:
+            date_condition = "(main.article_date IS NULL AND main.id < %s)"
+        params: list[Any] = [id]
     else:
-        # Use LIKE with the search pattern
-        return (
-            "(n.title LIKE %s OR n.description LIKE %s OR n.source_url LIKE %s)",
-            [search_query, search_query, search_query],
-            False
-        )
+        date_condition = f"main.article_date {after} %s OR (main.article_date = %s AND main.id {after} %s)"
+        if not reverse:
+            date_condition += " OR main.article_date IS NULL"
+        date_condition = f"({date_condition})"
+        params = [date, date, id]
+
+    if status == "positive":
+        return date_condition, params
+    return (
+        f"(main.source < %s OR (main.source = %s AND {date_condition}))",
+        [source, source] + params,
+    )
 
 
 def get_articles(
@@ -1259,52 +1856,32 @@ def get_articles(
     skip_reason: int = -1,
     is_url_search: bool = False,
     cleaned_url: str = "",
-) -> Optional[tuple[int, list[dict[str, Any]]]]:
-    start = start + " 00:00:00"
-    end = end + " 23:59:59"
+    page_cursor: Optional[str] = None,
+    total_count: Optional[int] = None,
+) -> Optional[tuple[int, list[dict[str, Any]], Optional[str]]]:
+    """
+    Returns a page of 10 articles of the list, grouped articles are listed once by the head of
+    their group (is_group_head).
 
-    # Build conditions once
-    conditions = []
-    params = []
-    has_text_search = False
-    is_fulltext = False
+    Pages are selected by page number with an offset, or if page_cursor is given by the cursor
+    returned with the previous page, which keeps the latency of deep pages flat. If the number of
+    listed articles is already known (total_count, see get_article_list), it is not counted again.
+
+    Returns:
+        Tuple of the number of listed articles, the articles of the page and the cursor of the
+        next page (None on the last page). None if the status is invalid.
 
+    Raises:
+        InvalidCursorError: if the cursor is malformed
+    """
     # Status condition
-    if status == "mixed":
-        conditions.append(
-            "n.classification_label = 1 AND n.processing_step = 4 AND n.annotation_label IS NULL AND COALESCE(n.skip_reason, 0) = 0"
-        )
-    elif status == "positive":
-        conditions.append("n.processing_step = 5 AND n.annotation_label = 1")
-    elif status == "negative":
-        conditions.append("n.processing_step = 5 AND n.annotation_label = 0")
-    elif status == "processing":
-        conditions.append("n.processing_step < 4")
-    elif status == "all":
-        conditions.append("n.processing_step >= 0")
-    else:
+    if status not in ARTICLE_STATUS_CONDITIONS:
         print("Invalid status provided!")
         return
-
-    # Domain condition
-    if domains and domains[0] != -1 and isinstance(domains, list):
-        domain_list = ",".join([str(domain) for domain in domains])
-        conditions.append(f"n.newspaper_id IN ({domain_list})")
-
-    # Search condition - use different logic for URL searches
-    if is_url_search and cleaned_url:
-        conditions.append("n.source_url = %s")
-        params.append(cleaned_url)
-    elif search_query != "%%" and search_query:
-        has_text_search = True
-        search_condition, search_params, is_fulltext = _build_search_condition(search_query)
-        if search_condition:
-            conditions.append(search_condition)
-            params.extend(search_params)
-
-    # Date condition
-    conditions.append("n.article_date BETWEEN %s AND %s")
-    params.extend([start, end])
+    conditions, params, has_text_search = _build_article_filter(
+        domains, search_query, start, end, is_url_search, cleaned_url
+    )
+    conditions.insert(0, ARTICLE_STATUS_CONDITIONS[status])
 
     # Skip reason condition
     if skip_reason != -1:
@@ -1313,112 +1890,37 @@ def get_articles(
 
     where_clause = " AND ".join(conditions)
 
-    # Sort configuration
-    sort_order = "ASC" if reverse else "DESC"
-    sort_field = (
-        "main.source DESC, main.article_date"
-        if status != "positive"
-        else "main.article_date"
-    )
+    # Sort configuration, pages after a cursor are selected by keyset instead of offset
+    order_clause = _article_order(status, reverse)
+    page_condition = ""
+    page_params: list[Any] = []
+    if page_cursor:
+        page_condition, page_params = _articles_after_cursor(status, reverse, page_cursor)
+        page_condition = f"AND {page_condition}"
+    limit_clause = "LIMIT 10" if page_cursor else f"LIMIT 10 OFFSET {(page - 1) * 10}"
 
     with connection.cursor(dictionary=True) as cursor:
-        # Optimization: Use a pre-computed table of main article IDs per group
-        # This avoids the expensive correlated subquery
-        
-        # Step 1: Create a temporary table or CTE to find main articles efficiently
-        # For MySQL 5.5 compatibility, we'll use a derived table approach
-        
-        offset = (page - 1) * 10
-        
-        # Optimized approach: First find matching articles, then resolve groups
-        # This is faster because we filter first, then handle grouping
-        
+        # A group is listed by its head if any of its articles matches, ungrouped articles are
+        # listed if they match themselves
         if has_text_search:
-            # For text searches, use a simpler approach that leverages indexes better
-            # First get IDs of matching articles with pagination
-            
-            # Build the main article condition (ungrouped or main of group)
-            main_article_condition = """
-                (main.group_id IS NULL OR main.id = (
-                    SELECT MIN(g.id) FROM autokmdb_news g WHERE g.group_id = main.group_id
-                ))
-            """
-            
-            # For search queries, first get matching IDs efficiently
-            match_query = f"""
-                SELECT main.id, main.group_id
-                FROM autokmdb_news main
-                WHERE {where_clause.replace('n.', 'main.')}
-            """
-            
-            cursor.execute(match_query, params)
-            matching_rows = cursor.fetchall()
-            
-            if not matching_rows:
-                return 0, []
-            
-            # Collect matching article IDs and their group IDs
-            matching_ids = set()
-            matching_group_ids = set()
-            
-            for row in matching_rows:
-                matching_ids.add(row['id'])
-                if row['group_id']:
-                    matching_group_ids.add(row['group_id'])
-            
-            # Get main article IDs for groups that have matches
-            group_main_ids = set()
-            if matching_group_ids:
-                groups_list = ",".join(map(str, matching_group_ids))
-                cursor.execute(f"""
-                    SELECT MIN(id) as main_id, group_id 
-                    FROM autokmdb_news 
-                    WHERE group_id IN ({groups_list}) 
-                    GROUP BY group_id
-                """)
-                for row in cursor.fetchall():
-                    group_main_ids.add(row['main_id'])
-            
-            # Final set of IDs to display: ungrouped matches + main articles of matching groups
-            ungrouped_matches = {mid for mid, row in zip(matching_ids, matching_rows) 
-                                if any(r['id'] == mid and r['group_id'] is None for r in matching_rows)}
-            
-            # Re-fetch to properly identify ungrouped
-            ungrouped_match_ids = set()
-            for row in matching_rows:
-                if row['group_id'] is None:
-                    ungrouped_match_ids.add(row['id'])
-            
-            display_ids = ungrouped_match_ids | group_main_ids
-            
-            if not display_ids:
-                return 0, []
-            
-            total_count = len(display_ids)
-            
-            # Get the paginated results
-            ids_list = ",".join(map(str, display_ids))
-            paginated_query = f"""
-                SELECT 
-                    main.id, main.clean_url AS url, main.description, main.title, main.source, 
-                    main.newspaper_name, main.newspaper_id, main.classification_score, 
-                    main.classification_label, main.annotation_label, main.processing_step, 
-                    main.skip_reason, main.negative_reason,
-                    CONVERT_TZ(main.article_date, @@session.time_zone, '+00:00') AS date, 
-                    main.category, u.name AS mod_name, main.group_id
-                FROM autokmdb_news main
-                LEFT JOIN users u ON main.mod_id = u.user_id
-                WHERE main.id IN ({ids_list})
-                ORDER BY {sort_field} {sort_order}
-                LIMIT 10 OFFSET {offset}
-            """
-            
-            cursor.execute(paginated_query)
-            main_articles = cursor.fetchall()
-            
+            # Text searches can match a large part of the archive, so the listed articles are
+            # resolved in a derived table, which MySQL 5.5 materializes once. An IN subquery
+            # would be a dependent subquery, run again for every group head.
+            listed_from = f"""(
+                    SELECT n.id FROM autokmdb_news n
+                    WHERE n.group_id IS NULL AND {where_clause}
+                    UNION ALL
+                    SELECT head.id FROM (
+                        SELECT DISTINCT n.group_id FROM autokmdb_news n
+                        WHERE n.group_id IS NOT NULL AND {where_clause}
+                    ) g
+                    JOIN autokmdb_news head
+                        ON head.is_group_head = TRUE AND head.group_id = g.group_id
+                ) listed
+                JOIN autokmdb_news main ON main.id = listed.id"""
+            listed_condition = "TRUE"
+            listed_params: list[Any] = params + params
         else:
-            # Non-search query: use the original optimized approach with some improvements
-            
             # Step 1: Find all group_ids that have at least one matching article
             qualifying_groups_query = f"""
                 SELECT DISTINCT n.group_id
@@ -1429,53 +1931,59 @@ def get_articles(
             cursor.execute(qualifying_groups_query, params)
             qualifying_groups = [row["group_id"] for row in cursor.fetchall()]
 
-            # Step 2: Build the main query with optimized logic
             if qualifying_groups:
                 groups_list = ",".join(map(str, qualifying_groups))
                 group_condition = f"main.group_id IN ({groups_list})"
             else:
                 group_condition = "FALSE"
 
-            # Count query - optimized to avoid correlated subquery when possible
-            count_query = f"""
-                SELECT COUNT(*) as total_count 
-                FROM autokmdb_news main
-                WHERE (main.group_id IS NULL 
-                       OR main.id = (SELECT MIN(n3.id) FROM autokmdb_news n3 WHERE n3.group_id = main.group_id))
-                  AND (
-                      (main.group_id IS NULL AND ({where_clause.replace('n.', 'main.')}))
-                      OR
-                      (main.group_id IS NOT NULL AND {group_condition})
-                  )
+            # Step 2: Count and paginate in SQL, groups are listed by their head, maintained when
+            # the groups change
+            listed_from = "autokmdb_news main"
+            listed_condition = f"""
+                (
+                    (main.group_id IS NULL AND ({where_clause.replace('n.', 'main.')}))
+                    OR
+                    (main.is_group_head = TRUE AND {group_condition})
+                )
             """
+            listed_params = params
+
+        count_query = f"""
+            SELECT COUNT(*) as total_count 
+            FROM {listed_from}
+            WHERE {listed_condition}
+        """
 
-            cursor.execute(count_query, params)
+        if total_count is None:
+            cursor.execute(count_query, listed_params)
             total_count = cursor.fetchone()["total_count"]
 
-            # Main query with pagination
-            paginated_query = f"""
-                SELECT 
-                    main.id, main.clean_url AS url, main.description, main.title, main.source, 
-                    main.newspaper_name, main.newspaper_id, main.classification_score, 
-                    main.classification_label, main.annotation_label, main.processing_step, 
-                    main.skip_reason, main.negative_reason,
-                    CONVERT_TZ(main.article_date, @@session.time_zone, '+00:00') AS date, 
-                    main.category, u.name AS mod_name, main.group_id
-                FROM autokmdb_news main
-                LEFT JOIN users u ON main.mod_id = u.user_id
-                WHERE (main.group_id IS NULL 
-                       OR main.id = (SELECT MIN(n3.id) FROM autokmdb_news n3 WHERE n3.group_id = main.group_id))
-                  AND (
-                      (main.group_id IS NULL AND ({where_clause.replace('n.', 'main.')}))
-                      OR
-                      (main.group_id IS NOT NULL AND {group_condition})
-                  )
-                ORDER BY {sort_field} {sort_order}
-                LIMIT 10 OFFSET {offset}
-            """
+        # Main query with pagination
+        paginated_query = f"""
+            SELECT 
+                main.id, main.clean_url AS url, main.description, main.title, main.source, 
+                main.newspaper_name, main.newspaper_id, main.classification_score, 
+                main.classification_label, main.annotation_label, main.processing_step, 
+                main.skip_reason, main.negative_reason,
+                CONVERT_TZ(main.article_date, @@session.time_zone, '+00:00') AS date, 
+                main.category, u.name AS mod_name, main.group_id,
+                main.article_date AS sort_date
+            FROM {listed_from}
+            LEFT JOIN users u ON main.mod_id = u.user_id
+            WHERE {listed_condition} {page_condition}
+            ORDER BY {order_clause}
+            {limit_clause}
+        """
+
+        cursor.execute(paginated_query, listed_params + page_params)
+        main_articles = cursor.fetchall()
 
-            cursor.execute(paginated_query, params)
-            main_articles = cursor.fetchall()
+        next_cursor: Optional[str] = (
+            _article_cursor(main_articles[-1]) if len(main_articles) == 10 else None
+        )
+        for article in main_articles:
+            del article["sort_date"]
 
         # Step 3: Bulk fetch all grouped articles for all groups on this page
         articles_with_groups = []
@@ -1525,16 +2033,176 @@ def get_articles(
 
             articles_with_groups.append(article)
 
-        return total_count, articles_with_groups
+        return total_count, articles_with_groups, next_cursor
+
+
+def _get_article_list_counts(
+    connection: PooledMySQLConnection,
+    domains: list[int],
+    search_query: str,
+    start: str,
+    end: str,
+    skip_reason: int,
+    is_url_search: bool,
+    cleaned_url: str,
+) -> tuple[dict[str, int], dict[str, int]]:
+    """
+    Counts the articles of every status tab in one scan of the filtered articles.
+
+    Returns:
+        Tuple of the counts of get_article_counts and the number of listed articles of each
+        status as counted by get_articles: the ungrouped articles and the groups with a match,
+        which are listed once by their head.
+    """
+    conditions, params, _ = _build_article_filter(
+        domains, search_query, start, end, is_url_search, cleaned_url
+    )
+    skip_condition = ""
+    if skip_reason != -1:
+        skip_condition = " AND n.skip_reason = " + str(int(skip_reason))
+
+    columns: list[str] = [
+        f"COUNT(CASE WHEN {condition} THEN n.id END) AS count_{status}"
+        for status, condition in ARTICLE_STATUS_CONDITIONS.items()
+        if status != "all"
+    ]
+    columns.append(
+        f"COUNT(CASE WHEN {ARTICLE_STATUS_CONDITIONS['all']}{skip_condition} THEN n.id END) AS count_all"
+    )
+    for status, condition in ARTICLE_STATUS_CONDITIONS.items():
+        columns.append(
+            f"""COUNT(CASE WHEN {condition}{skip_condition} AND n.group_id IS NULL THEN n.id END)
+            + COUNT(DISTINCT CASE WHEN {condition}{skip_condition} THEN n.group_id END) AS listed_{status}"""
+        )
+    query = f"""
+        SELECT {", ".join(columns)}
+        FROM autokmdb_news n
+        WHERE {" AND ".join(conditions)}
+    """
+    with connection.cursor(dictionary=True) as cursor:
+        cursor.execute(query, params)
+        result: dict[str, Any] = cursor.fetchone()
+    counts: dict[str, int] = {
+        status: int(result[f"count_{status}"]) for status in ARTICLE_STATUS_CONDITIONS
+    }
+    listed: dict[str, int] = {
+        status: int(result[f"listed_{status}"]) for status in ARTICLE_STATUS_CONDITIONS
+    }
+    return counts, listed
+
+
+def get_article_list(
+    connection: PooledMySQLConnection,
+    page: int,
+    status: str,
+    domains: list[int],
+    search_query="",
+    start="2000-01-01",
+    end="2050-01-01",
+    reverse=False,
+    skip_reason: int = -1,
+    is_url_search: bool = False,
+    cleaned_url: str = "",
+    page_cursor: Optional[str] = None,
+) -> Optional[dict[str, Any]]:
+    """
+    Returns the counts of the status tabs and a page of the article list together, the
+    combination of get_article_counts and get_articles. The counts of all tabs are queried in one
+    scan, and the page query reuses the count of its tab.
+
+    The counts and the pages are cached for ARTICLE_LIST_CACHE_TTL seconds by the normalized
+    filter, so switching between the tabs and pages of the same filter doesn't query the counts
+    again. The annotations of the UI clear the cache, changes of the processors show up after the
+    TTL.
+
+    Returns:
+        Dict with the 'counts' of the tabs (see get_article_counts), the number of 'pages' of the
+        tab, the 'articles' of the page and the 'next_cursor'. None if the status is invalid.
+
+    Raises:
+        InvalidCursorError: if the cursor is malformed
+    """
+    if status not in ARTICLE_STATUS_CONDITIONS:
+        print("Invalid status provided!")
+        return None
+    filter_key: tuple = (
+        tuple(sorted(set(domains))) if domains and domains[0] != -1 else (),
+        cleaned_url if is_url_search and cleaned_url else search_query.lower(),
+        is_url_search and bool(cleaned_url),
+        start,
+        end,
+        int(skip_reason),
+    )
+    page_key: tuple = filter_key + (status, bool(reverse), page_cursor or int(page))
+
+    with article_list_cache_lock:
+        cached_counts: Optional[tuple] = article_list_cache.get(("counts", filter_key))
+        cached_page: Optional[tuple] = article_list_cache.get(("page", page_key))
+
+    if cached_counts is None:
+        cached_counts = _get_article_list_counts(
+            connection,
+            domains,
+            search_query,
+            start,
+            end,
+            skip_reason,
+            is_url_search,
+            cleaned_url,
+        )
+        # stored only on a miss, setting an entry again would restart its TTL
+        with article_list_cache_lock:
+            article_list_cache[("counts", filter_key)] = cached_counts
+    counts, listed = cached_counts
+
+    if cached_page is None:
+        article_response = get_articles(
+            connection,
+            page,
+            status,
+            domains,
+            search_query,
+            start,
+            end,
+            reverse,
+            skip_reason,
+            is_url_search,
+            cleaned_url,
+            page_cursor,
+            total_count=listed[status],
+        )
+        if article_response is None:
+            return None
+        _, articles, next_cursor = article_response
+        cached_page = (articles, next_cursor)
+        with article_list_cache_lock:
+            article_list_cache[("page", page_key)] = cached_page
+    articles, next_cursor = cached_page
+
+    return {
+        "counts": counts,
+        "pages": ceil(listed[status] / 10),
+        "articles": articles,
+        "next_cursor": next_cursor,
+    }
+
+
+def clear_article_list_cache() -> None:
+    """Clears the cached counts and pages of the article list, called after annotations."""
+    with article_list_cache_lock:
+        article_list_cache.clear()
 
 
 def force_accept_article(
     connection: PooledMySQLConnection, id: int, user_id: int
 ) -> None:
-    query = """UPDATE autokmdb_news SET classification_label = 1, processing_step = 4, skip_reason = NULL, source = 1, mod_id = %s WHERE id = %s;"""
+    query = """UPDATE autokmdb_news SET classification_label = 1, processing_step = 4, skip_reason = NULL, source = 1, mod_id = %s, lease_owner = NULL, lease_expires = NULL WHERE id = %s;"""
     with connection.cursor() as cursor:
         cursor.execute(query, (user_id, id))
     connection.commit()
+    clear_article_list_cache()
+    refresh_daily_stats(connection, [id])
+    notify_step(4)
 
 
 def annote_negative(
@@ -1570,6 +2238,8 @@ def annote_negative(
             cursor.execute(query_remove_other, (news_id,))
             cursor.execute(query_remove_lang, (news_id,))
     connection.commit()
+    clear_article_list_cache()
+    refresh_daily_stats(connection, [id])
 
 
 def create_person(connection: PooledMySQLConnection, name: str, user_id: int) -> int:
@@ -2004,20 +2674,25 @@ def annote_positive(
         setTags(cursor, news_id, persons, newspaper_name, institutions, places, others)
 
     connection.commit()
+    clear_article_list_cache()
+    refresh_daily_stats(connection, [id])
 
 
 def save_ner_step(connection: PooledMySQLConnection, id):
-    query = """UPDATE autokmdb_news SET processing_step = 3 WHERE id = %s;"""
+    query = """UPDATE autokmdb_news SET processing_step = 3, lease_owner = NULL, lease_expires = NULL WHERE id = %s;"""
     with connection.cursor() as cursor:
         cursor.execute(query, (id,))
     connection.commit()
+    notify_step(3)
 
 
 def save_keyword_step(connection: PooledMySQLConnection, id):
-    query = """UPDATE autokmdb_news SET processing_step = 4 WHERE id = %s;"""
+    query = """UPDATE autokmdb_news SET processing_step = 4, lease_owner = NULL, lease_expires = NULL WHERE id = %s;"""
     with connection.cursor() as cursor:
         cursor.execute(query, (id,))
     connection.commit()
+    refresh_daily_stats(connection, [id])
+    notify_step(4)
 
 
 def get_rss_urls(connection: PooledMySQLConnection):
@@ -0,0 +1,30 @@
+from typing import Optional
+from lxml import html as lxml_html
+from lxml.html import HtmlElement
+
+
+class HtmlDocument:
+    """
+    Downloaded html of an article, shared by the extraction hooks of a newspaper plugin. The html
+    is parsed with lxml on first access of the tree, so it is parsed at most once per article.
+
+    Args:
+        url: url of the article
+        html: html of the article
+    """
+
+    def __init__(self, url: str, html: str) -> None:
+        self.url: str = url
+        self.html: str = html
+        self._tree: Optional[HtmlElement] = None
+
+    @property
+    def tree(self) -> HtmlElement:
+        if self._tree is None:
+            try:
+                self._tree = lxml_html.fromstring(self.html)
+            except ValueError:
+                # lxml refuses str input with an xml encoding declaration
+                self._tree = lxml_html.fromstring(self.html.encode("utf-8"))
+        return self._tree
+
@@ -1,20 +1,17 @@
 from typing import Optional
+from lxml.html import HtmlElement
+from auto_kmdb.newspapers.HtmlDocument import HtmlDocument
 from auto_kmdb.newspapers.Newspaper import Newspaper
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 
 
 class Hvg(Newspaper):
-    def is_url_this(self, url: str, html: str) -> bool:
-        return urlparse(url).netloc.endswith("hvg.hu")
+    domain_suffixes = ["hvg.hu"]
 
-    def get_title(self, url: str, html: str) -> Optional[str]:
-        soup = BeautifulSoup(html, 'html.parser')
+    def get_title(self, doc: HtmlDocument) -> Optional[str]:
+        title_tag: Optional[HtmlElement] = doc.tree.find(".//title")
 
-        title_tag = soup.title
-
-        if title_tag and title_tag.string:
-            title_text = title_tag.string.strip()
+        if title_tag is not None and title_tag.text and len(title_tag) == 0:
+            title_text = title_tag.text.strip()
 
             if '|' in title_text:
                 title_text = '|'.join(title_text.split('|')[:-1]).strip()
@@ -1,63 +1,87 @@
 from typing import Optional
+from lxml.cssselect import CSSSelector
+from lxml.html import HtmlElement
+from auto_kmdb.newspapers.HtmlDocument import HtmlDocument
 from auto_kmdb.newspapers.Newspaper import Newspaper
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 
 
 class Mediaworks(Newspaper):
-    def is_url_this(self, url: str, html: str) -> bool:
-        return urlparse(url).netloc in [
-            "www.baon.hu",
-            "www.bama.hu",
-            "www.beol.hu",
-            "www.boon.hu",
-            "www.delmagyar.hu",
-            "www.duol.hu",
-            "www.feol.hu",
-            "www.haon.hu",
-            "www.heol.hu",
-            "www.szoljon.hu",
-            "www.kemma.hu",
-            "www.nool.hu",
-            "www.sonline.hu",
-            "www.szon.hu",
-            "www.teol.hu",
-            "www.vaol.hu",
-            "www.veol.hu",
-            "www.zaol.hu",
-            "mandiner.hu",
-            "magyarnemzet.hu",
-            "szabadfold.hu",
-            "www.origo.hu",
-            "www.vg.hu",
-            "www.borsonline.hu",
-            "ripost.hu",
-            "metropol.hu",
-        ]
+    domains = [
+        "baon.hu",
+        "bama.hu",
+        "beol.hu",
+        "boon.hu",
+        "delmagyar.hu",
+        "duol.hu",
+        "feol.hu",
+        "haon.hu",
+        "heol.hu",
+        "szoljon.hu",
+        "kemma.hu",
+        "nool.hu",
+        "sonline.hu",
+        "szon.hu",
+        "teol.hu",
+        "vaol.hu",
+        "veol.hu",
+        "zaol.hu",
+        "mandiner.hu",
+        "magyarnemzet.hu",
+        "szabadfold.hu",
+        "origo.hu",
+        "vg.hu",
+        "borsonline.hu",
+        "ripost.hu",
+        "metropol.hu",
+    ]
 
-    def get_description(self, url: str, html: str) -> Optional[str]:
-        soup = BeautifulSoup(html, "html.parser")
-        lead_p = soup.select_one("p.lead")
+    lead_selector = CSSSelector("p.lead")
+    paragraph_selector = CSSSelector(
+        ".block-content p, .block-content li, .article-text-formatter p, .article-text-formatter li"
+    )
+
+    def get_description(self, doc: HtmlDocument) -> Optional[str]:
+        lead_p = self.lead_selector(doc.tree)
         if lead_p:
-            return lead_p.text
+            return lead_p[0].text_content()
+        return None
+
+    def _get_string(self, element) -> Optional[str]:
+        # the single string inside the element, like .string of BeautifulSoup
+        if not isinstance(element, HtmlElement):
+            return element.text
+        if len(element) == 0:
+            return element.text
+        if len(element) == 1 and not element.text and not element[0].tail:
+            return self._get_string(element[0])
         return None
 
-    def get_text(self, url: str, html: str) -> str:
-        soup = BeautifulSoup(html, "html.parser")
-        paragraphs = soup.select(
-            ".block-content p, .block-content li, .article-text-formatter p, .article-text-formatter li"
-        )
+    def get_text(self, doc: HtmlDocument) -> str:
+        paragraphs: list[HtmlElement] = self.paragraph_selector(doc.tree)
 
         parsed_text: list[str] = []
         for p in paragraphs:
             text_parts = []
-            for element in p.contents:
-                if element.name == "a":
-                    link_text = element.get_text(strip=True)
+            # direct children of the paragraph, text nodes and elements in document order
+            contents: list = [p.text]
+            for child in p:
+                contents.append(child)
+                contents.append(child.tail)
+            for element in contents:
+                if element is None:
+                    continue
+                if isinstance(element, str):
+                    clean_text = element.strip()
+                    if clean_text:
+                        text_parts.append(clean_text)
+                elif element.tag == "a":
+                    link_text = "".join(
+                        [t.strip() for t in element.itertext(with_tail=False)]
+                    )
                     if link_text:
                         text_parts.append(link_text)
-                elif element.string is not None:
-                    clean_text = element.string.strip()
+                elif self._get_string(element) is not None:
+                    clean_text = self._get_string(element).strip()
                     if clean_text:
                         text_parts.append(clean_text)
 
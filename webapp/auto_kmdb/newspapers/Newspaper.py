@@ -1,20 +1,28 @@
 from typing import Optional
+from auto_kmdb.newspapers.HtmlDocument import HtmlDocument
 
 
 class Newspaper:
+    # netlocs of the newspaper without "www.", e.g. "telex.hu"
+    domains: list[str] = []
+    # the netloc and all subdomains are matched, e.g. "hvg.hu" also matches "kkv.hvg.hu"
+    domain_suffixes: list[str] = []
+
     def __init__(self) -> None:
         pass
 
     def is_url_this(self, url: str, html: str) -> Optional[bool]:
-        pass
+        from auto_kmdb.newspapers import get_newspaper
+
+        return get_newspaper(url) is self
 
-    def get_text(self, url: str, html: str) -> Optional[str]:
+    def get_text(self, doc: HtmlDocument) -> Optional[str]:
         pass
 
-    def get_title(self, url: str, html: str) -> Optional[str]:
+    def get_title(self, doc: HtmlDocument) -> Optional[str]:
         pass
 
-    def get_description(self, url: str, html: str) -> Optional[str]:
+    def get_description(self, doc: HtmlDocument) -> Optional[str]:
         pass
 
     def get_feed(self):
@@ -1,16 +1,15 @@
 from typing import Optional
+from lxml.cssselect import CSSSelector
+from auto_kmdb.newspapers.HtmlDocument import HtmlDocument
 from auto_kmdb.newspapers.Newspaper import Newspaper
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 
 
 class Propeller(Newspaper):
-    def is_url_this(self, url: str, html: str) -> bool:
-        return urlparse(url).netloc in ["propeller.hu", "www.propeller.hu"]
+    domains = ["propeller.hu"]
+    lead_selector = CSSSelector("div.entry-content p")
 
-    def get_description(self, url: str, html: str) -> Optional[str]:
-        soup = BeautifulSoup(html, "html.parser")
-        lead_p = soup.select_one("div.entry-content p")
+    def get_description(self, doc: HtmlDocument) -> Optional[str]:
+        lead_p = self.lead_selector(doc.tree)
         if lead_p:
-            return lead_p.text
+            return lead_p[0].text_content()
         return None
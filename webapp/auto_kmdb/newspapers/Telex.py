@@ -1,27 +1,34 @@
-from typing import LiteralString
-from bs4.element import Tag
+from lxml.cssselect import CSSSelector
+from lxml.html import HtmlElement
+from auto_kmdb.newspapers.HtmlDocument import HtmlDocument
 from auto_kmdb.newspapers.Newspaper import Newspaper
-from bs4 import BeautifulSoup, ResultSet
-from urllib.parse import urlparse
 
 
 class Telex(Newspaper):
-    ignored_tags = ["<strong>", "</strong>"]
+    domains = ["telex.hu"]
+    # tags replaced by a space, so the words around them are not glued together
+    ignored_tags = ["strong"]
+    paragraph_selector = CSSSelector(
+        "div.article-html-content p, div.article-html-content li"
+    )
 
-    def is_url_this(self, url: str, html: str) -> bool:
-        return urlparse(url).netloc == "telex.hu"
+    def _get_spaced_text(self, element: HtmlElement) -> str:
+        parts: list[str] = [element.text or ""]
+        for child in element:
+            if isinstance(child, HtmlElement):
+                spaced: bool = child.tag in self.ignored_tags
+                parts.append(" " if spaced else "")
+                parts.append(self._get_spaced_text(child))
+                parts.append(" " if spaced else "")
+            parts.append(child.tail or "")
+        return "".join(parts)
 
-    def get_text(self, url: str, html: str) -> str:
-        for tag in self.ignored_tags:
-            html = html.replace(tag, " ").replace("  ", " ")
-        soup = BeautifulSoup(html, "html.parser")
-        paragraphs: ResultSet[Tag] = soup.select(
-            "div.article-html-content p, div.article-html-content li"
-        )
+    def get_text(self, doc: HtmlDocument) -> str:
+        paragraphs: list[HtmlElement] = self.paragraph_selector(doc.tree)
 
         parsed_text: list[str] = []
         for p in paragraphs:
-            text: str = p.get_text().strip()
+            text: str = self._get_spaced_text(p).replace("  ", " ").strip()
             if text:
                 parsed_text.append(text)
 
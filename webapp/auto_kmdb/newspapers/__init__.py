@@ -0,0 +1,62 @@
+from typing import Optional
+from urllib.parse import urlparse
+from auto_kmdb.newspapers.Newspaper import Newspaper
+from auto_kmdb.newspapers.Telex import Telex
+from auto_kmdb.newspapers.Atv import Atv
+from auto_kmdb.newspapers.Mediaworks import Mediaworks
+from auto_kmdb.newspapers.Hvg import Hvg
+from auto_kmdb.newspapers.Propeller import Propeller
+
+# normalized netloc -> plugin, for the exact domains and the domain suffixes of the plugins
+newspapers_by_domain: dict[str, Newspaper] = {}
+newspapers_by_suffix: dict[str, Newspaper] = {}
+
+
+def normalize_netloc(netloc: str) -> str:
+    """Lowercase host of a netloc without credentials, port, "www." and trailing dot."""
+    host: str = netloc.rsplit("@", 1)[-1].split(":", 1)[0].lower().rstrip(".")
+    return host.removeprefix("www.")
+
+
+def register(paper: Newspaper) -> Newspaper:
+    """
+    Adds a newspaper plugin to the registry under its declared domains and domain suffixes.
+
+    Args:
+        paper: instance of the plugin
+
+    Returns:
+        The registered plugin.
+    """
+    for domain in paper.domains:
+        newspapers_by_domain.setdefault(normalize_netloc(domain), paper)
+    for suffix in paper.domain_suffixes:
+        newspapers_by_suffix.setdefault(normalize_netloc(suffix), paper)
+    return paper
+
+
+def get_newspaper(url: str) -> Optional[Newspaper]:
+    """
+    Finds the plugin of the newspaper of a url, with one dict lookup per label of the host.
+
+    Args:
+        url: url of an article
+
+    Returns:
+        The plugin, None if no plugin handles the url.
+    """
+    host: str = normalize_netloc(urlparse(url).netloc)
+    paper: Optional[Newspaper] = newspapers_by_domain.get(host)
+    if paper is not None or not newspapers_by_suffix:
+        return paper
+    labels: list[str] = host.split(".")
+    for i in range(len(labels)):
+        paper = newspapers_by_suffix.get(".".join(labels[i:]))
+        if paper is not None:
+            return paper
+    return None
+
+
+newspapers: list[Newspaper] = [
+    register(paper) for paper in [Telex(), Atv(), Mediaworks(), Hvg(), Propeller()]
+]
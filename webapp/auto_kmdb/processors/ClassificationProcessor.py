@@ -1,4 +1,5 @@
 from os import environ
+import numpy as np
 from numpy import ndarray
 from sklearn.svm import SVC
 from transformers.tokenization_utils_base import BatchEncoding
@@ -13,44 +14,30 @@ from transformers import (
 )
 import torch.nn.functional as F
 from auto_kmdb import db
+from auto_kmdb.utils.minhash_index import MinHashIndex
 from joblib import load
 import torch
 import logging
 import gc
 import traceback
-from datetime import datetime
+from typing import Optional
 from google import genai
 from google.genai import types
 from google.genai.types import GenerateContentResponse
 from datasketch import MinHash
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import SnowballStemmer
-
-# Download required NLTK data
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords")
-
-# Initialize Hungarian stemmer and stopwords
-hungarian_stemmer = SnowballStemmer("hungarian")
-try:
-    hungarian_stopwords = set(stopwords.words("hungarian"))
-except OSError:
-    # Fallback if Hungarian stopwords are not available
-    hungarian_stopwords = set()
+from auto_kmdb.utils.minhash import create_minhash, create_minhashes
 
 USE_GEMINI = environ.get("USE_GEMINI", "false").lower() == "true"
 SIMILARITY_THRESHOLD = 0.15
 CLASSIFICATION_SCORE_THRESHOLD = 0.42
 GEMINI_MODEL = environ.get("GEMINI_MODEL", "gemini-2.5-flash-preview-05-20")
+# micro-batches of the batched inference are bounded by both the number of articles and the
+# number of (padded) tokens, so memory use stays flat for long titles and descriptions
+CLASSIFICATION_BATCH_SIZE = int(environ.get("CLASSIFICATION_BATCH_SIZE", "16"))
+CLASSIFICATION_MAX_TOKENS = int(environ.get("CLASSIFICATION_MAX_TOKENS", "4096"))
 
-# In-memory search index for MinHash similarity
-search_index = (
-    []
-)  # List of dicts: {"id": autokmdb_id, "minhash": minhash_obj, "domain": domain, "date": date}
+# LSH index of the MinHash signatures of today's articles, persisted to data/minhash_index
+search_index = MinHashIndex(SIMILARITY_THRESHOLD)
 
 
 def genai_label(title, description, text):
@@ -134,71 +121,26 @@ Ez volt a cikk, most dönts, hogy illik-e az adatbázisba, a választ sima json
     return response.parsed["label"], token_counts
 
 
-def text_to_shingles(text: str, k: int = 1) -> set:
-    """Convert text to k-shingles (k-grams) for MinHash."""
-    # Clean and normalize text
-    text = re.sub(r"[^\w\s]", " ", text.lower())
-    text = re.sub(r"\s+", " ", text.strip())
-    words = text.split()
-
-    # Remove stopwords and stem words
-    processed_words = []
-    for word in words:
-        if word not in hungarian_stopwords and len(word) > 2:
-            stemmed_word = hungarian_stemmer.stem(word)
-            processed_words.append(stemmed_word)
-
-    # Create k-shingles
-    shingles = set()
-    for i in range(len(processed_words) - k + 1):
-        shingle = " ".join(processed_words[i : i + k])
-        shingles.add(shingle)
-
-    return shingles
-
-
-def create_minhash(text: str) -> MinHash:
-    """Create MinHash signature from text."""
-    shingles = text_to_shingles(text)
-    minhash = MinHash(num_perm=128)
-    for shingle in shingles:
-        minhash.update(shingle.encode("utf-8"))
-    return minhash
+def find_similar_minhash(
+    text: str,
+    domain: str,
+    threshold: float = 0.7,
+    target_minhash: Optional[MinHash] = None,
+):
+    """Find similar articles using MinHash similarity."""
+    if target_minhash is None:
+        target_minhash = create_minhash(text)
+    # only articles of today and of other domains, sorted by distance (1 - similarity)
+    return search_index.query(target_minhash, domain, threshold, limit=10)
 
 
-def find_similar_minhash(text: str, domain: str, threshold: float = 0.7):
-    """Find similar articles using MinHash similarity."""
-    target_minhash = create_minhash(text)
-    now = datetime.now()
-    date = now.strftime("%Y-%m-%d")
-
-    similar_articles = []
-    for article in search_index:
-        # Skip articles from same domain or different date
-        if article["date"] != date or (domain and article["domain"] == domain):
-            continue
-
-        similarity = target_minhash.jaccard(article["minhash"])
-        print(f"similarity: {similarity} for article {article['id']}")
-        if similarity >= threshold:
-            similar_articles.append(
-                (article["id"], 1 - similarity)
-            )  # Convert to distance
-
-    # Sort by distance (lower is more similar)
-    similar_articles.sort(key=lambda x: x[1])
-    return similar_articles[:10]  # Return top 10
-
-
-def add_to_search_index(autokmdb_id: int, text: str, domain: str):
-    """Add article to in-memory search index."""
-    now = datetime.now()
-    date = now.strftime("%Y-%m-%d")
-
-    minhash = create_minhash(text)
-    search_index.append(
-        {"id": autokmdb_id, "minhash": minhash, "domain": domain, "date": date}
-    )
+def add_to_search_index(
+    autokmdb_id: int, text: str, domain: str, minhash: Optional[MinHash] = None
+):
+    """Add article to the search index of today."""
+    if minhash is None:
+        minhash = create_minhash(text)
+    search_index.add(autokmdb_id, minhash, domain)
 
 
 CATEGORY_MAP: dict[str, int] = {"hungarian-news": 0, "eu-news": 1, "world-news": 2}
@@ -209,7 +151,39 @@ def format_article(title, description, url):
     return f"{title}\n{description}\n({domain})"
 
 
+def make_batches(
+    lengths: list[int], max_batch_size: int, max_tokens: int
+) -> list[list[int]]:
+    """
+    Groups inputs into micro-batches of similar length to minimize padding.
+
+    Args:
+        lengths: number of tokens of each input
+        max_batch_size: maximum number of inputs in a batch
+        max_tokens: maximum number of tokens in a batch after padding, a single input longer than
+            this still gets its own batch
+
+    Returns:
+        List of batches, each batch is a list of indices into lengths.
+    """
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # inputs are sorted by length, so the new one determines the padded length
+        if batch and (
+            len(batch) >= max_batch_size or (len(batch) + 1) * lengths[i] > max_tokens
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 class ClassificationProcessor(Processor):
+    step = 1
+
     def __init__(self) -> None:
         logging.info("Initializing classification processor")
         self.done: bool = False
@@ -249,6 +223,83 @@ class ClassificationProcessor(Processor):
         )
         return output.logits, cls_embedding
 
+    def _label(
+        self, score: float, title: str, description: str, text: str
+    ) -> int:
+        """Thresholds the classification score, optionally double checking positives with Gemini."""
+        label = 1 if score > CLASSIFICATION_SCORE_THRESHOLD else 0
+        if label == 1 and USE_GEMINI and text.strip():
+            try:
+                google_label, token_counts = genai_label(title, description, text)
+                if google_label:
+                    label = 1
+                else:
+                    label = 0
+                logging.info(
+                    f"Google Gemini classification: {google_label}, token counts: {token_counts}"
+                )
+            except Exception as e:
+                logging.error(f"Error in Google Gemini labeling: {e}")
+        return label
+
+    def predict_batch(self, rows: list[dict]) -> list[tuple[int, float, int, str]]:
+        """
+        Batched version of predict for a slice of the classification queue.
+
+        The inputs are tokenized once, grouped into micro-batches of similar length (see
+        make_batches), each micro-batch is run through the model in a single forward pass and the
+        category classifier is called once on the stacked CLS embeddings of all rows.
+
+        Args:
+            rows: rows of the classification queue, must contain 'title', 'description', 'text'
+                and 'clean_url'
+
+        Returns:
+            List of (label, score, category, article_text) tuples in the order of rows.
+        """
+        if not rows:
+            return []
+        device = environ.get("DEVICE", "cpu")
+        prediction_texts: list[str] = [
+            format_article(row["title"], row["description"], row["clean_url"])
+            for row in rows
+        ]
+        encodings: BatchEncoding = self.tokenizer(
+            prediction_texts, truncation=True, max_length=512
+        )
+        lengths: list[int] = [len(input_ids) for input_ids in encodings["input_ids"]]
+
+        scores: list[float] = [0.0] * len(rows)
+        cls_embeddings: list[ndarray] = [None] * len(rows)
+        with torch.no_grad():
+            for batch in make_batches(
+                lengths, CLASSIFICATION_BATCH_SIZE, CLASSIFICATION_MAX_TOKENS
+            ):
+                inputs = self.tokenizer.pad(
+                    [{key: encodings[key][i] for key in encodings} for i in batch],
+                    return_tensors="pt",
+                ).to(device)
+                output = self.model(**inputs, output_hidden_states=True)
+                probabilities = F.softmax(output.logits, dim=-1)[:, 1].cpu().numpy()
+                batch_embeddings = output.hidden_states[-1][:, 0, :].cpu().numpy()
+                for j, i in enumerate(batch):
+                    scores[i] = float(probabilities[j])
+                    cls_embeddings[i] = batch_embeddings[j]
+                del inputs, output, probabilities
+
+        categories = self.svm_classifier.predict(np.stack(cls_embeddings))
+
+        predictions: list[tuple[int, float, int, str]] = []
+        for row, prediction_text, score, category in zip(
+            rows, prediction_texts, scores, categories
+        ):
+            label = self._label(score, row["title"], row["description"], row["text"])
+            article_text: str = prediction_text if label == 1 else None
+            predictions.append(
+                (label, score, CATEGORY_MAP.get(category, 0), article_text)
+            )
+        return predictions
+
     def predict(
         self, title: str, description: str, text: str, url: str
     ) -> tuple[int, float, int, str]:
@@ -264,19 +315,7 @@ class ClassificationProcessor(Processor):
 
             probabilities = F.softmax(logits[0], dim=-1)
             score = float(probabilities[1])
-            label = 1 if score > CLASSIFICATION_SCORE_THRESHOLD else 0
-            if label == 1 and USE_GEMINI and text.strip():
-                try:
-                    google_label, token_counts = genai_label(title, description, text)
-                    if google_label:
-                        label = 1
-                    else:
-                        label = 0
-                    logging.info(
-                        f"Google Gemini classification: {google_label}, token counts: {token_counts}"
-                    )
-                except Exception as e:
-                    logging.error(f"Error in Google Gemini labeling: {e}")
+            label = self._label(score, title, description, text)
 
             if label == 1:
                 article_text = prediction_text
@@ -300,7 +339,33 @@ class ClassificationProcessor(Processor):
         with db.connection_pool.get_connection() as connection:
             next_rows = db.get_classification_queue(connection)
 
-        for next_row in next_rows:
+        predictions: Optional[list[tuple[int, float, int, str]]] = None
+        try:
+            predictions = self.predict_batch(next_rows)
+        except Exception as e:
+            # fall back to classifying the articles one by one, so a single bad row is skipped
+            logging.warning("Batched classification failed, classifying one by one")
+            logging.error(e)
+
+        # signatures of the positive articles are computed together, used for grouping below
+        minhashes: dict[int, MinHash] = {}
+        if predictions is not None:
+            similarity_rows: list = [
+                row
+                for row, prediction in zip(next_rows, predictions)
+                if row is not None and prediction[0] == 1 and row["source"] != 2
+            ]
+            minhashes = dict(
+                zip(
+                    [row["id"] for row in similarity_rows],
+                    create_minhashes(
+                        f"{row['title']}\n{row['description']}\n{row['text']}"
+                        for row in similarity_rows
+                    ),
+                )
+            )
+
+        for i, next_row in enumerate(next_rows):
             if next_row is None:
                 sleep(30)
                 return
@@ -310,16 +375,22 @@ class ClassificationProcessor(Processor):
             )
 
             try:
-                label, score, category, article_text = self.predict(
-                    next_row["title"],
-                    next_row["description"],
-                    next_row["text"],
-                    next_row["clean_url"],
-                )
+                if predictions is not None:
+                    label, score, category, article_text = predictions[i]
+                else:
+                    label, score, category, article_text = self.predict(
+                        next_row["title"],
+                        next_row["description"],
+                        next_row["text"],
+                        next_row["clean_url"],
+                    )
                 domain = ".".join(next_row["clean_url"].split("/")[2].split(".")[-2:])
                 if label == 1 and next_row["source"] != 2: # Skip old articles
                     similar_result = find_similar_minhash(
-                        full_text, domain, SIMILARITY_THRESHOLD
+                        full_text,
+                        domain,
+                        SIMILARITY_THRESHOLD,
+                        minhashes.get(autokmdb_id),
                     )
                     good_results = [
                         (article_id, distance)
@@ -361,7 +432,9 @@ class ClassificationProcessor(Processor):
                         break  # temporary solution
 
                     # Add to search index for future comparisons
-                    add_to_search_index(autokmdb_id, full_text, domain)
+                    add_to_search_index(
+                        autokmdb_id, full_text, domain, minhashes.get(autokmdb_id)
+                    )
 
                 with db.connection_pool.get_connection() as connection:
                     self._save_classification(
@@ -379,3 +452,4 @@ class ClassificationProcessor(Processor):
 
         torch.cuda.empty_cache()
         gc.collect()
+        return len(next_rows)
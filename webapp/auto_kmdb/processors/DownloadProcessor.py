@@ -1,83 +1,49 @@
-from multiprocessing import process
-from typing import NamedTuple, List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+import multiprocessing
+import threading
 
 from flask.ctx import AppContext
 from playwright._impl._api_structures import Cookie
 from playwright.sync_api._generated import Browser, BrowserContext, Page
 from auto_kmdb.processors import Processor
-from auto_kmdb.utils.same_news import same_news
+from auto_kmdb.utils.html_archive import get_html_archive
 from auto_kmdb import db
-from auto_kmdb.utils.preprocess import (
-    do_replacements,
-    replacements,
-    common_descriptions,
-    trim_title,
+from auto_kmdb.utils.article_parser import (
+    ArticleDownload,
+    get_scraper,
+    init_parse_worker,
+    process_article,
+    proxy_host,
 )
-from time import sleep
-import newspaper
+from time import monotonic, sleep
 import os
 import requests
-from bs4 import BeautifulSoup
 import logging
 from datetime import datetime, timedelta
 from playwright.sync_api import sync_playwright
-from auto_kmdb.newspapers.Telex import Telex
-from auto_kmdb.newspapers.Atv import Atv
-from auto_kmdb.newspapers.Mediaworks import Mediaworks
-from auto_kmdb.newspapers.Hvg import Hvg
-from auto_kmdb.newspapers.Propeller import Propeller
-from datetime import timezone
 import traceback
-from auto_kmdb.newspapers.Newspaper import Newspaper
-import cloudscraper
 
 
-scraper = cloudscraper.create_scraper(browser="chrome")
-
-
-class ArticleDownload(NamedTuple):
-    text: str
-    title: str
-    description: str
-    authors: str
-    date: Optional[datetime]
-    is_paywalled: int
-    same_news_id: Optional[int]
-
-
-newspapers: list[Newspaper] = [Telex(), Atv(), Mediaworks(), Hvg(), Propeller()]
-proxy_host: str = os.environ["MYSQL_HOST"]
-request_proxies: dict[str, str] = {
-    "http": "socks5h://" + proxy_host + ":1080",
-    "https": "socks5h://" + proxy_host + ":1080",
-}
-newspaper_config = newspaper.configuration.Configuration()
-newspaper_config.update(fetch_images=False)
-scraper.proxies.update(request_proxies)
 playwright_proxy = {"server": "socks5://" + proxy_host + ":1080"}
 
-
-def get_custom_text(url: str, html: str) -> Optional[str]:
-    for paper in newspapers:
-        if paper.is_url_this(url, html):
-            return paper.get_text(url, html)
-
-
-def get_custom_description(url: str, html: str) -> Optional[str]:
-    for paper in newspapers:
-        if paper.is_url_this(url, html):
-            return paper.get_description(url, html)
-
-
-def get_custom_title(url: str, html: str) -> Optional[str]:
-    for paper in newspapers:
-        if paper.is_url_this(url, html):
-            return paper.get_title(url, html)
+# number of articles downloaded at the same time, and at most per domain
+DOWNLOAD_WORKERS: int = int(os.environ.get("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_DOMAIN_WORKERS: int = int(os.environ.get("DOWNLOAD_DOMAIN_WORKERS", "1"))
+# minimum number of seconds between the start of two requests to the same domain
+DOWNLOAD_DOMAIN_DELAY: float = float(os.environ.get("DOWNLOAD_DOMAIN_DELAY", "1"))
+DOWNLOAD_TIMEOUT: float = float(os.environ.get("DOWNLOAD_TIMEOUT", "30"))
+# number of processes parsing the downloaded html, 0 parses in the downloading threads
+PARSE_WORKERS: int = int(os.environ.get("PARSE_WORKERS", "2"))
 
 
 def get_html(url: str, cookies: dict[str, str]) -> str:
     headers: dict[str, str] = {"User-Agent": "autokmdb"}
-    response: requests.Response = scraper.get(url, headers=headers, cookies=cookies)
+    response: requests.Response = get_scraper().get(
+        url, headers=headers, cookies=cookies, timeout=DOWNLOAD_TIMEOUT
+    )
     if response.status_code >= 400:
         raise Exception(
             "Got error while downloading article.",
@@ -88,95 +54,14 @@ def get_html(url: str, cookies: dict[str, str]) -> str:
     return str(response.text)
 
 
-def process_article(
-    url: str, html: str, cookies: dict[str, str], skip_paywalled=False
-) -> ArticleDownload:
-    article = newspaper.Article(url=url, config=newspaper_config)
-    article.download(
-        input_html=html.replace("<br>", "\n"),
-    )
-    article.parse()
-
-    text: str = article.text
-    title: str = article.title
-    is_paywalled: int = 0
-
-    if not skip_paywalled:
-        if "Csatlakozz a Körhöz, és olvass tovább!" in article.html:
-            logging.info("found paywalled 444 article")
-            text = get_444(url.split("?")[0], cookies)
-            is_paywalled = 1
-        elif "hvg.hu/360/" in url:
-            logging.info("found paywalled hvg360 article")
-            try:
-                text += "\n" + get_hvg(url.split("/360/")[1].split("?")[0])
-            except Exception as e:
-                logging.error("Error fetching HVG360 article: " + str(e))
-            is_paywalled = 1
-
-    try:
-        custom_text: Optional[str] = get_custom_text(url, article.html)
-        if custom_text:
-            text = custom_text
-    except Exception as e:
-        logging.error(e)
-
-    try:
-        custom_title = get_custom_title(url, article.html)
-        if custom_title:
-            title = custom_title
-    except Exception as e:
-        logging.error(e)
-
-    title = trim_title(title)
-    title = do_replacements(title, replacements).strip()
-    text = do_replacements(text, replacements).strip()
-
-    authors: str = ",".join([a for a in article.authors if " " in a])
-
-    description: str = article.meta_description
-    for common_description in common_descriptions:
-        description = description.replace(common_description.strip(), "")
-
+def archive_html(url: str, html: str) -> None:
+    """Stores downloaded html in the html archive, failing to do so is only logged."""
     try:
-        custom_description: Optional[str] = get_custom_description(url, article.html)
-        if custom_description:
-            description = custom_description
+        get_html_archive().put(url, html)
     except Exception as e:
+        logging.error("Failed to archive html of " + url)
         logging.error(e)
 
-    if len(description) < 1 and text.count("\n") > 1:
-        article_lines: str = text.splitlines()[0]
-        description = article_lines[: article_lines[:400].rfind(".") + 1]
-        if "." not in article_lines[:400]:
-            description = article_lines[:400]
-
-    date: Optional[datetime] = None
-    if article.publish_date:
-        date = article.publish_date.astimezone(timezone.utc)
-
-    same_news_id: Optional[int] = same_news(title, description, text)
-
-    if not title:
-        logging.warning("Title is empty")
-        raise Exception("Title is empty")
-
-    paywall_texts = [
-        "Csatlakozz a Körhöz, és olvass tovább!",
-        "A teljes cikket előfizetőink olvashatják el.",
-        "A keresett cikk a portfolio.hu hírarchívumához tartozik, melynek olvasása előfizetéses regisztrációhoz kötött.",
-        "Ez a cikk folytatódik, de csak Portfolio Signature előfizetéssel olvasható tovább.",
-        "Ez egy remek cikk a nyomtatott Magyar Narancsból, amely online is elérhető.",
-        "A cikk innentől csak a Qubit+ előfizetőinek elérhető. Csatlakozz, és olvass tovább!",
-    ]
-
-    if "hvg.hu/360/" in url or any([text in article.html for text in paywall_texts]):
-        is_paywalled = 1
-
-    return ArticleDownload(
-        text, title, description, authors, date, is_paywalled, same_news_id
-    )
-
 
 def save_article(
     article_download: ArticleDownload,
@@ -289,7 +174,7 @@ def login_24(username: str, password: str) -> dict[str, str]:
 def login_magyarnarancs(username: str, password: str):
     username = username.strip('"')
     password = password.strip('"')
-    response = scraper.post(
+    response = get_scraper().post(
         "https://magyarnarancs.hu/?block=User_Login&ajax=1",
         data={
             "login_email": username,
@@ -307,7 +192,7 @@ def login_magyarnarancs(username: str, password: str):
 def login_portfolio(username: str, password: str):
     username = username.strip('"')
     password = password.strip('"')
-    response = scraper.post(
+    response = get_scraper().post(
         "https://profil.portfolio.hu/belepes",
         data={
             "username": username,
@@ -323,7 +208,7 @@ def login_portfolio(username: str, password: str):
 def login_jelen(username: str, password: str):
     username = username.strip('"')
     password = password.strip('"')
-    response = scraper.post(
+    response = get_scraper().post(
         "https://elofizetes.jelen.media/bejelentkezes",
         data={
             "LoginForm[username]": username,
@@ -339,7 +224,7 @@ def login_jelen(username: str, password: str):
 def login_hang(username: str, password: str):
     username = username.strip('"')
     password = password.strip('"')
-    response = scraper.post(
+    response = get_scraper().post(
         "https://hang.hu/?block=User_Login&ajax=1",
         data={
             "login_email": username,
@@ -416,44 +301,6 @@ def login_444(username: str, password: str) -> dict[str, str]:
         return cookies_444
 
 
-def get_444(url: str, cookies: dict[str, str]) -> str:
-    article_name: str = url.split("/")[-1]
-    date: str = "-".join(url.split("/")[-4:-1])
-    bucket = "444"
-    if url.count("/") == 7:
-        bucket: str = url.split("/")[3]
-
-    response: requests.Response = scraper.get(
-        f"https://gateway.ipa.444.hu/api/graphql?crunch=2&operationName=fetchContent&variables=%7B%22onlyReports%22%3Afalse%2C%22order%22%3A%22DESC%22%2C%22slug%22%3A%22{article_name}%22%2C%22date%22%3A%22{date}%22%2C%22buckets%22%3A%5B%22{bucket}%22%5D%2C%22cursorInclusive%22%3Afalse%7D&extensions=%7B%22persistedQuery%22%3A%7B%22version%22%3A1%2C%22sha256Hash%22%3A%22376c5324c94249caa29a66aeb02f8ed7c593ce2d9036098f1ba63a545405c96a%22%7D%7D",
-        cookies=cookies,
-    )
-    text: str = "\n".join(
-        [
-            BeautifulSoup(f["content"], features="lxml").text
-            for f in response.json()["data"]["crunched"][-1]["content"]["body"][0]
-            if isinstance(f, dict) and "content" in f
-        ]
-    )
-
-    return text
-
-
-def get_hvg(webid: str) -> str:
-    token: str = os.environ["TOKEN_HVG"]
-    response: requests.Response = scraper.get(
-        f"https://api.hvg.hu/web//articles/premiumcontent/?webid={webid}&apiKey=4f67ed9596ac4b11a4b2ac413e7511af",
-        headers={"Authorization": "Bearer " + token},
-    )
-    soup = BeautifulSoup(response.json(), features="lxml")
-    premium_text: str = "\n".join([t.text for t in soup.find_all("p")])
-    premium_text: str = premium_text.replace(
-        "A hvg360 tartalma, így a fenti cikk is, olyan érték, ami nem jöhetett volna létre a te előfizetésed nélkül. Ha tetszett az írásunk, akkor oszd meg a minőségi újságírás élményét szeretteiddel is, és ajándékozz hvg360-előfizetést!",
-        "",
-    )
-
-    return premium_text
-
-
 def do_retries(app_context: AppContext, cookies: dict[str, str] = {}) -> None:
     app_context.push()
 
@@ -466,10 +313,20 @@ def do_retries(app_context: AppContext, cookies: dict[str, str] = {}) -> None:
     for row in rows:
         logging.info("retrying: " + row["url"])
         try:
-            html: str = get_html(row["url"], cookies)
-            article_download: ArticleDownload = process_article(
-                row["url"], html, cookies
-            )
+            # the archived html is tried first, it is enough if only parsing failed before
+            article_download: Optional[ArticleDownload] = None
+            archived_html: Optional[str] = get_html_archive().get(row["clean_url"])
+            if archived_html is not None:
+                try:
+                    article_download = process_article(
+                        row["url"], archived_html, cookies
+                    )
+                except Exception as e:
+                    logging.info("archived html failed, downloading again: " + str(e))
+            if article_download is None:
+                html: str = get_html(row["url"], cookies)
+                archive_html(row["clean_url"], html)
+                article_download = process_article(row["url"], html, cookies)
             save_article(
                 article_download,
                 row["newspaper_id"],
@@ -481,9 +338,83 @@ def do_retries(app_context: AppContext, cookies: dict[str, str] = {}) -> None:
         sleep(3)
 
 
+class DomainLimiter:
+    """
+    Limits the number of concurrent requests per domain and keeps a minimum delay between the
+    start of two requests to the same domain, so concurrent downloading stays polite.
+
+    Args:
+        max_concurrent: maximum number of concurrent requests to a domain
+        delay: minimum number of seconds between the start of two requests to a domain
+    """
+
+    def __init__(self, max_concurrent: int, delay: float) -> None:
+        self.max_concurrent: int = max_concurrent
+        self.delay: float = delay
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @contextmanager
+    def limit(self, domain: str) -> Iterator[None]:
+        with self._lock:
+            semaphore = self._semaphores.setdefault(
+                domain, threading.BoundedSemaphore(self.max_concurrent)
+            )
+        with semaphore:
+            with self._lock:
+                # reserve the next start time of the domain, then wait for it outside the lock
+                now: float = monotonic()
+                start: float = max(now, self._next_start.get(domain, now))
+                self._next_start[domain] = start + self.delay
+            if start > now:
+                sleep(start - now)
+            yield
+
+
 class DownloadProcessor(Processor):
+    step = 0
+
     def __init__(self) -> None:
         self.cookies: dict[str, dict[str, str]] = {}
+        self.download_pool = ThreadPoolExecutor(
+            max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download"
+        )
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        self.parse_pool_lock = threading.Lock()
+        self.domain_limiter = DomainLimiter(
+            DOWNLOAD_DOMAIN_WORKERS, DOWNLOAD_DOMAIN_DELAY
+        )
+
+    def start_parse_pool(self) -> None:
+        if PARSE_WORKERS < 1:
+            return
+        # Forking this process could copy locks held by its other threads, so the workers are
+        # started from a fork server. They import the auto_kmdb package again, the variable
+        # keeps it from starting the app (this process has already read it).
+        os.environ["AUTO_KMDB_NO_APP"] = "1"
+        self.parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=init_parse_worker,
+        )
+
+    def parse(self, url: str, html: str, cookies: dict[str, str]) -> ArticleDownload:
+        """Runs process_article in the parse pool, or in the calling thread without a pool."""
+        pool: Optional[ProcessPoolExecutor] = self.parse_pool
+        if pool is None:
+            return process_article(url, html, cookies)
+        try:
+            return pool.submit(process_article, url, html, cookies).result()
+        except BrokenProcessPool:
+            # a worker died (e.g. killed for memory), later articles get a new pool. The
+            # downloading threads share the pool, only the first one to notice replaces it.
+            with self.parse_pool_lock:
+                if self.parse_pool is pool:
+                    logging.error("parse pool is broken, restarting it")
+                    pool.shutdown(wait=False)
+                    self.start_parse_pool()
+            raise
 
     def load_model(self):
         cookies_24: dict[str, str] = {}
@@ -544,16 +475,18 @@ class DownloadProcessor(Processor):
             "jelen.media": cookies_jelen,
             "hang.hu": cookies_hang,
         }
+        self.start_parse_pool()
         self.done = True
         logging.info("initialized download processor")
 
-    def process_next(self) -> None:
+    def process_next(self) -> int:
         with db.connection_pool.get_connection() as connection:
             next_rows: list = db.get_download_queue(connection)
         if type(next_rows) is not list:
             next_rows = [next_rows]
-        for next_row in next_rows:
-            self.process_row(next_row)
+        # rows are downloaded concurrently, a slow site only holds up its own domain
+        wait([self.download_pool.submit(self.process_row, row) for row in next_rows])
+        return len(next_rows)
 
     def check_short(self, article: ArticleDownload) -> bool:
         return (
@@ -569,12 +502,15 @@ class DownloadProcessor(Processor):
         try:
             domain: str = next_row["url"].split("/")[2]
             cookies = self.cookies.get(domain, {})
-            html: str = get_html(
-                next_row["url"], cookies if domain not in ["444.hu", "qubit.hu"] else {}
-            )
+            with self.domain_limiter.limit(domain):
+                html: str = get_html(
+                    next_row["url"],
+                    cookies if domain not in ["444.hu", "qubit.hu"] else {},
+                )
+            archive_html(next_row["url"], html)
             if cookies:
                 logging.info("using cookies for domain: " + domain)
-            article_download: ArticleDownload = process_article(
+            article_download: ArticleDownload = self.parse(
                 next_row["url"], html, cookies
             )
 
@@ -115,6 +115,8 @@ class CTFIDFClassifier:
 
 
 class KeywordProcessor(Processor):
+    step = 3
+
     def __init__(self):
         # super().__init__()
         logging.info("initialized keyword processor")
@@ -179,3 +181,4 @@ class KeywordProcessor(Processor):
                         1,
                     )
                 db.save_keyword_step(connection, next_row["id"])
+        return len(next_rows)
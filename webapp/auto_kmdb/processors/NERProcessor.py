@@ -5,9 +5,11 @@ from auto_kmdb.db import add_auto_place, get_all_persons, get_all_institutions
 from auto_kmdb.db import save_ner_step, get_all_places, skip_processing_error
 from auto_kmdb.utils.entity_linking import (
     get_entities_freq,
+    get_keyword_index,
     get_mapping,
     comb_mappings,
     get_synonyms_file,
+    lemma_cache,
 )
 from auto_kmdb.processors import Processor
 from time import sleep
@@ -75,7 +77,13 @@ def strip_entity(entity: dict):
     return entity
 
 
+# number of 512 token windows run through the model together in batch mode
+NER_BATCH_SIZE: int = int(environ.get("NER_BATCH_SIZE", "8"))
+
+
 class NERProcessor(Processor):
+    step = 2
+
     def __init__(self):
         # super().__init__()
         logging.info("initialized ner processor")
@@ -114,12 +122,46 @@ class NERProcessor(Processor):
 
     def predict(self, text) -> tuple[list[dict], list[dict], list[dict]]:
         logging.info("ner processor is running prediction")
+        return self._split_entities(text, self.classifier(text))
+
+    def predict_batch(
+        self, texts: list[str]
+    ) -> list[tuple[list[dict], list[dict], list[dict]]]:
+        """
+        Batched version of predict for many articles.
+
+        The pipeline splits every article into 512 token windows (overlapping by the stride), the
+        articles are sorted by length so the windows batched together need little padding, and
+        NER_BATCH_SIZE windows of possibly different articles are run in one forward pass. The
+        pipeline returns the entities of each article with char offsets into that article.
+
+        Args:
+            texts: texts of the articles
+
+        Returns:
+            List of (people, institutions, places) tuples in the order of texts.
+        """
+        if not texts:
+            return []
+        logging.info(f"ner processor is running batch prediction on {len(texts)} articles")
+        order: list[int] = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        outputs: list[list[dict]] = self.classifier(
+            [texts[i] for i in order], batch_size=NER_BATCH_SIZE
+        )
+        results: list = [None] * len(texts)
+        for i, classifications in zip(order, outputs):
+            results[i] = self._split_entities(texts[i], classifications)
+        return results
+
+    def _split_entities(
+        self, text: str, raw_classifications: list[dict]
+    ) -> tuple[list[dict], list[dict], list[dict]]:
         people: list[dict] = []
         institutions: list[dict] = []
         places: list[dict] = []
         classifications: list[dict] = [
             strip_entity(e)
-            for e in join_entities(self.classifier(text))
+            for e in join_entities(raw_classifications)
             if len(e["word"]) > 3
         ]
         for entity in classifications:
@@ -184,7 +226,11 @@ class NERProcessor(Processor):
             lowercase_mapping = None
         keywords: pd.DataFrame = get_entities_freq(entity_type)
         mapping: pd.DataFrame = get_mapping(
-            detected_entities, keywords.index, self.nlp, lowercase_mapping
+            detected_entities,
+            keywords.index,
+            self.nlp,
+            lowercase_mapping,
+            keyword_index=get_keyword_index(entity_type),
         )
         combed_mapping: pd.DataFrame = comb_mappings(mapping, keywords)
 
@@ -203,7 +249,11 @@ class NERProcessor(Processor):
 
         return combed_mapping
 
-    def do_process(self, next_row):
+    def do_process(
+        self,
+        next_row,
+        entities: Optional[tuple[list[dict], list[dict], list[dict]]] = None,
+    ):
         def add_institution_dot(name, ent_type):
             if (
                 name.endswith("Kft")
@@ -216,7 +266,9 @@ class NERProcessor(Processor):
             return name
 
         text: str = next_row["text"]
-        people, institutions, places = self.predict(text)
+        if entities is None:
+            entities = self.predict(text)
+        people, institutions, places = entities
 
         print("ner processing: " + str(next_row["id"]))
         logging.info("ner processing next: " + str(next_row["id"]))
@@ -252,20 +304,35 @@ class NERProcessor(Processor):
 
         with connection_pool.get_connection() as connection:
             save_ner_step(connection, next_row["id"])
+        logging.debug(f"lemma cache: {lemma_cache.stats()}")
 
     def process_next(self):
         with connection_pool.get_connection() as connection:
             next_rows: list = get_ner_queue(connection)
+
+        # rows without text are left to the one by one path, which skips them
+        batch_rows: list = [row for row in next_rows if row and row["text"]]
+        batch_entities: dict[int, tuple] = {}
+        try:
+            predictions = self.predict_batch([row["text"] for row in batch_rows])
+            batch_entities = {
+                row["id"]: entities for row, entities in zip(batch_rows, predictions)
+            }
+        except Exception as e:
+            logging.warning("batched ner prediction failed, predicting one by one")
+            logging.error(e)
+
         for next_row in next_rows:
             if next_row is None:
                 sleep(10)
                 return
             torch.cuda.empty_cache()
             try:
-                self.do_process(next_row)
+                self.do_process(next_row, batch_entities.get(next_row["id"]))
             except Exception as e:
                 skip_processing_error(connection, next_row["id"])
                 logging.warn("exception during: " + str(next_row["id"]))
                 logging.error(e)
                 print(traceback.format_exc())
                 logging.error(traceback.format_exc())
+        return len(next_rows)
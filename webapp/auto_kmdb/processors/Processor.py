@@ -1,9 +1,14 @@
 from time import sleep
+from typing import Optional
+from auto_kmdb.utils.step_events import clear_step, wait_for_step
 import logging
 import traceback
 
 
 class Processor:
+    # processing_step of the queue this processor consumes, None if it is not queue based
+    step: Optional[int] = None
+
     def __init__(self):
         pass
 
@@ -13,7 +18,8 @@ class Processor:
     def predict(self):
         pass
 
-    def process_next(self):
+    def process_next(self) -> Optional[int]:
+        """Processes the next batch of the queue and returns the number of rows taken from it."""
         pass
 
     def is_done(self):
@@ -23,8 +29,10 @@ class Processor:
         self.load_model()
         logging.info("started process_loop")
         while True:
+            if self.step is not None:
+                clear_step(self.step)
             try:
-                self.process_next()
+                processed: Optional[int] = self.process_next()
             except Exception as e:
                 logging.error(
                     "encountered error in processing loop",
@@ -33,4 +41,11 @@ class Processor:
                     traceback.format_exc(),
                 )
                 sleep(60)
-            sleep(3)
+                continue
+            if processed:
+                # the queue may hold more rows than a single batch, continue right away
+                continue
+            if self.step is None:
+                sleep(3)
+            else:
+                wait_for_step(self.step)
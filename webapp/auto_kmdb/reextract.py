@@ -0,0 +1,222 @@
+"""
+Extracts the title, description and text of stored articles again from the archived html, e.g.
+after a newspaper plugin or the replacements of utils/preprocess changed, and writes back the
+articles whose content changed.
+
+Usage (from the webapp directory):
+    AUTO_KMDB_NO_APP=1 python -m auto_kmdb.reextract [--newspaper-id ID] [--from YYYY-MM-DD]
+        [--to YYYY-MM-DD] [--workers N] [--batch-size N] [--dry-run]
+
+AUTO_KMDB_NO_APP=1 keeps importing the package from starting the web app and the processors.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Optional
+import argparse
+import logging
+import multiprocessing
+
+from auto_kmdb import db
+from auto_kmdb.newspapers import get_newspaper
+from auto_kmdb.utils.article_parser import ArticleDownload, process_article
+from auto_kmdb.utils.html_archive import HtmlArchive
+from auto_kmdb.utils.search_index import SearchIndex, get_search_index
+
+FIELDS: list[str] = ["title", "description", "text"]
+
+# archive of the worker process, a sqlite connection must not be inherited through fork
+worker_archive: Optional[HtmlArchive] = None
+
+
+def init_worker() -> None:
+    global worker_archive
+    worker_archive = HtmlArchive()
+
+
+def extract(
+    article_id: int, url: str
+) -> tuple[int, str, float, Optional[ArticleDownload], Optional[str]]:
+    """
+    Runs process_article on the archived html of an article, in a worker process.
+
+    Returns:
+        Tuple of the id, the name of the plugin of the url, the seconds process_article took, the
+        result and the error message if it failed. Both result and error are None if the html of
+        the article has not been archived.
+    """
+    paper = get_newspaper(url)
+    plugin: str = type(paper).__name__ if paper else "generic"
+    html: Optional[str] = worker_archive.get(url)
+    if html is None:
+        return article_id, plugin, 0.0, None, None
+    start: float = perf_counter()
+    try:
+        # paywalled content would be fetched from the network, those articles are not queried
+        article: ArticleDownload = process_article(url, html, {}, skip_paywalled=True)
+    except Exception as e:
+        return article_id, plugin, perf_counter() - start, None, str(e)
+    return article_id, plugin, perf_counter() - start, article, None
+
+
+class Report:
+    """Per plugin counters of a re-extraction run."""
+
+    def __init__(self) -> None:
+        self.plugins: dict[str, dict[str, float]] = {}
+
+    def add(
+        self, plugin: str, seconds: float, status: str, changed_fields: list[str]
+    ) -> None:
+        counters: dict[str, float] = self.plugins.setdefault(
+            plugin,
+            {
+                "articles": 0,
+                "seconds": 0.0,
+                "missing": 0,
+                "failed": 0,
+                "changed": 0,
+                **{field: 0 for field in FIELDS},
+            },
+        )
+        counters["articles"] += 1
+        counters["seconds"] += seconds
+        if status in ["missing", "failed", "changed"]:
+            counters[status] += 1
+        for field in changed_fields:
+            counters[field] += 1
+
+    def format(self) -> str:
+        lines: list[str] = [
+            f"{'plugin':<12} {'articles':>9} {'ms/article':>10} {'missing':>8} {'failed':>7} "
+            f"{'changed':>8} {'title':>6} {'descr.':>6} {'text':>6}"
+        ]
+        for plugin, c in sorted(self.plugins.items()):
+            parsed: float = c["articles"] - c["missing"]
+            per_article: float = 1000 * c["seconds"] / parsed if parsed else 0.0
+            lines.append(
+                f"{plugin:<12} {c['articles']:>9.0f} {per_article:>10.1f} {c['missing']:>8.0f} "
+                f"{c['failed']:>7.0f} {c['changed']:>8.0f} {c['title']:>6.0f} "
+                f"{c['description']:>6.0f} {c['text']:>6.0f}"
+            )
+        return "\n".join(lines)
+
+
+def reextract(
+    newspaper_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    workers: int = 4,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> Report:
+    """
+    Streams the stored articles through process_article in a process pool, one batch of
+    batch_size articles at a time, and writes back the changed articles of each batch in a single
+    transaction.
+
+    Args:
+        newspaper_id: only articles of this newspaper, optional
+        date_from: only articles added on or after this date (YYYY-MM-DD), optional
+        date_to: only articles added before this date (YYYY-MM-DD), optional
+        workers: number of worker processes
+        batch_size: number of articles queried and written back together
+        dry_run: only report the changes, without writing them back
+
+    Returns:
+        Report of the run.
+    """
+    report = Report()
+    after_id: int = 0
+    search_index: Optional[SearchIndex] = get_search_index()
+    # fork is safe here, no other threads run without the app
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_worker,
+    ) as pool:
+        while True:
+            with db.connection_pool.get_connection() as connection:
+                rows: list[dict] = db.get_articles_for_reextraction(
+                    connection, after_id, batch_size, newspaper_id, date_from, date_to
+                )
+            if not rows:
+                break
+            after_id = rows[-1]["id"]
+            rows_by_id: dict[int, dict] = {row["id"]: row for row in rows}
+
+            changed_articles: list[tuple[str, str, str, int]] = []
+            for article_id, plugin, seconds, article, error in pool.map(
+                extract,
+                [row["id"] for row in rows],
+                [row["clean_url"] for row in rows],
+                chunksize=16,
+            ):
+                if article is None:
+                    if error is not None:
+                        logging.warning(f"re-extraction of {article_id} failed: {error}")
+                    report.add(plugin, seconds, "failed" if error else "missing", [])
+                    continue
+                row: dict = rows_by_id[article_id]
+                changed_fields: list[str] = [
+                    field
+                    for field in FIELDS
+                    if (row[field] or "") != (getattr(article, field) or "")
+                ]
+                report.add(
+                    plugin, seconds, "changed" if changed_fields else "same", changed_fields
+                )
+                if changed_fields:
+                    changed_articles.append(
+                        (article.title, article.description, article.text, article_id)
+                    )
+
+            if changed_articles and not dry_run:
+                with db.connection_pool.get_connection() as connection:
+                    db.save_reextracted_articles(connection, changed_articles)
+                # mod_time is kept, so the search indexer doesn't see these changes
+                if search_index is not None:
+                    search_index.add(
+                        {
+                            **rows_by_id[article_id],
+                            "title": title,
+                            "description": description,
+                        }
+                        for title, description, _, article_id in changed_articles
+                    )
+            logging.info(
+                f"re-extracted articles up to id {after_id}, {len(changed_articles)} changed"
+            )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Extract stored articles again from the archived html."
+    )
+    parser.add_argument("--newspaper-id", type=int, default=None)
+    parser.add_argument("--from", dest="date_from", default=None)
+    parser.add_argument("--to", dest="date_to", default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    report: Report = reextract(
+        args.newspaper_id,
+        args.date_from,
+        args.date_to,
+        args.workers,
+        args.batch_size,
+        args.dry_run,
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Any, Callable, Optional
 from flask import Response, jsonify, Blueprint, request
+from mysql.connector.pooling import PooledMySQLConnection
 from auto_kmdb import db
 from auto_kmdb.utils.preprocess import clear_url
 from math import ceil
@@ -44,10 +45,17 @@ def get_articles_by_day():
     end: str = content.get("to", "2050-01-01")
     newspaper_id: Optional[int] = content.get("newspaper_id", None)
     with db.connection_pool.get_connection() as connection:
-        articles_by_day: list[dict] = db.get_articles_by_day(newspaper_id)
+        articles_by_day: list[dict] = db.get_articles_by_day(newspaper_id, start, end)
 
         output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=articles_by_day[0].keys())
+        writer = csv.DictWriter(
+            output,
+            fieldnames=(
+                articles_by_day[0].keys()
+                if articles_by_day
+                else ["date", "total_count", "count_positive", "count_negative"]
+            ),
+        )
 
         writer.writeheader()
         writer.writerows(articles_by_day)
@@ -66,7 +74,7 @@ def get_articles_by_day_json():
     end: str = content.get("to", "2050-01-01")
     newspaper_id: Optional[int] = content.get("newspaper_id", None)
     with db.connection_pool.get_connection() as connection:
-        articles_by_day: list[dict] = db.get_articles_by_day(newspaper_id)
+        articles_by_day: list[dict] = db.get_articles_by_day(newspaper_id, start, end)
         for article in articles_by_day:
             if "date" in article and type(article["date"]) == datetime:
                 article["date"] = article["date"].strftime("%Y-%m-%d")
@@ -152,8 +160,42 @@ def api_article_by_url():
         return jsonify({"error": "Hiba a keresés során!"}), 500
 
 
-@api.route("/articles", methods=["POST"])
-def api_articles():
+def parse_article_list_filters(content: dict) -> dict[str, Any]:
+    """
+    Returns the keyword arguments of db.get_articles and db.get_article_list from the body of an
+    article list request.
+    """
+    q: str = content.get("q", "")
+    domains: dict = content["domain"]
+    # Check if search term is a URL and clean it
+    is_url_search: bool = is_url(q)
+    return {
+        "page": content.get("page", 1),
+        "status": content.get("status", "mixed"),
+        "domains": [domain["id"] for domain in domains] if domains else [-1],
+        "search_query": "%" + q + "%",
+        "start": content.get("from", "2000-01-01"),
+        "end": content.get("to", "2050-01-01"),
+        "reverse": content.get("reverse", False),
+        "skip_reason": content.get("skip_reason", -1),
+        "is_url_search": is_url_search,
+        "cleaned_url": clear_url(q) if is_url_search else "",
+        # optional, the next_cursor of the previous page, replaces page
+        "page_cursor": content.get("cursor"),
+    }
+
+
+def article_list_response(
+    fetch: Callable[[PooledMySQLConnection, dict[str, Any]], Optional[dict]],
+) -> tuple[Response, int]:
+    """
+    Handles an article list request: checks the session, parses the filters and returns the
+    result of fetch for them, or the error of the request.
+
+    Args:
+        fetch: called with a database connection and the filters (see
+            parse_article_list_filters), returns the response body, None on an invalid status
+    """
     session_id: Optional[str] = get_session_id(request)
     with db.connection_pool.get_connection() as connection:
         if not db.validate_session(connection, session_id):
@@ -164,46 +206,53 @@ def api_articles():
     if not content:
         return jsonify({}), 400
 
-    page: int = content.get("page", 1)
-    status: str = content.get("status", "mixed")
-    start: str = content.get("from", "2000-01-01")
-    end: str = content.get("to", "2050-01-01")
-    q: str = content.get("q", "")
-    domains: dict = content["domain"]
-    domain_ids: list[int] = [domain["id"] for domain in domains] if domains else [-1]
-    reverse: bool = content.get("reverse", False)
-    skip_reasin: int = content.get("skip_reason", -1)
-
-    # Check if search term is a URL and clean it
-    is_url_search = is_url(q)
-    cleaned_url = clear_url(q) if is_url_search else ""
-
     try:
+        filters: dict[str, Any] = parse_article_list_filters(content)
         with db.connection_pool.get_connection() as connection:
-            article_response = db.get_articles(
-                connection,
-                page,
-                status,
-                domain_ids,
-                "%" + q + "%",
-                start,
-                end,
-                reverse,
-                skip_reasin,
-                is_url_search,
-                cleaned_url,
-            )
-            if article_response is None:
-                return jsonify({"error": "Hiba a lekérés során!"}), 500
-            length, articles = article_response
-            articles = db.group_articles(articles)
-
-        return jsonify({"pages": ceil(length / 10), "articles": articles}), 200
+            body: Optional[dict] = fetch(connection, filters)
+        if body is None:
+            return jsonify({"error": "Hiba a lekérés során!"}), 500
+        return jsonify(body), 200
+    except db.InvalidCursorError:
+        return jsonify({"error": "Érvénytelen cursor!"}), 400
     except Exception as e:
         logging.error(f"Error fetching articles: {e}")
         return jsonify({"error": "Hiba a lekérés során!"}), 500
 
 
+@api.route("/articles", methods=["POST"])
+def api_articles():
+    def fetch(connection: PooledMySQLConnection, filters: dict[str, Any]) -> Optional[dict]:
+        article_response = db.get_articles(connection, **filters)
+        if article_response is None:
+            return None
+        length, articles, next_cursor = article_response
+        return {
+            "pages": ceil(length / 10),
+            "articles": db.group_articles(articles),
+            "next_cursor": next_cursor,
+        }
+
+    return article_list_response(fetch)
+
+
+@api.route("/article_list", methods=["POST"])
+def api_article_list():
+    """
+    The counts of /article_counts and the page of /articles for the same filters in one
+    request, see db.get_article_list.
+    """
+
+    def fetch(connection: PooledMySQLConnection, filters: dict[str, Any]) -> Optional[dict]:
+        article_list: Optional[dict] = db.get_article_list(connection, **filters)
+        if article_list is None:
+            return None
+        article_list["articles"] = db.group_articles(article_list["articles"])
+        return article_list
+
+    return article_list_response(fetch)
+
+
 @api.route("/annote/negative", methods=["POST"])
 def not_corruption():
     session_id: Optional[str] = get_session_id(request)
@@ -403,9 +452,8 @@ def add_url():
 
     with db.connection_pool.get_connection() as connection:
         url: str = content["url"]
-        if db.check_url_exists(connection, url):
-            return jsonify({"error": "Cikk már létezik"}), 400
-        db.init_news(
+        # the insert is skipped if the url already exists
+        inserted: bool = db.init_news(
             connection,
             "manual" if not api_key else "api",
             url,
@@ -415,6 +463,8 @@ def add_url():
             user_id,
             None,
         )
+        if not inserted:
+            return jsonify({"error": "Cikk már létezik"}), 400
         return jsonify({}), 200
 
 
@@ -1,25 +1,28 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import re
 from typing import Any, Optional
 import feedparser
 from auto_kmdb import db
+from auto_kmdb.utils.article_parser import get_scraper
+from auto_kmdb.utils.feed_scheduler import FeedScheduler, FeedState
 from auto_kmdb.utils.preprocess import clear_url
+from auto_kmdb.utils.seen_urls import SeenUrls
 import logging
 import requests
 from datetime import date
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from time import sleep
 import json
 import os
-import cloudscraper
 
+# number of feeds fetched at the same time, and the timeout of a single feed request in seconds
+RSS_WORKERS: int = int(os.environ.get("RSS_WORKERS", "8"))
+RSS_TIMEOUT: float = float(os.environ.get("RSS_TIMEOUT", "20"))
+# number of recently seen article urls kept in memory, urls in it are not checked in the database
+RSS_SEEN_URLS_SIZE: int = int(os.environ.get("RSS_SEEN_URLS_SIZE", "200000"))
 
-scraper = cloudscraper.create_scraper(browser="chrome")
-proxy_host: str = os.environ["MYSQL_HOST"]
-request_proxies: dict[str, str] = {
-    "http": "socks5h://" + proxy_host + ":1080",
-    "https": "socks5h://" + proxy_host + ":1080",
-}
-scraper.proxies.update(request_proxies)
+seen_urls = SeenUrls(RSS_SEEN_URLS_SIZE)
 
 
 def load_json_from_file(filename: str) -> dict:
@@ -38,38 +41,79 @@ def rss_watcher(app_context):
     app_context.push()
     with db.connection_pool.get_connection() as connection:
         newspapers: list[dict] = db.get_rss_urls(connection)
-    while True:
-        articles = []
-        for newspaper in newspapers:
-            if newspaper["rss_url"]:
-                dont_convert: bool = False
-                if newspaper["name"] in ["Pécsi Stop"]:
-                    dont_convert = True
+        seen_urls.update(db.get_recent_urls(connection, RSS_SEEN_URLS_SIZE))
+    logging.info(f"RSS watcher knows {len(seen_urls)} recent urls")
+    scheduler = FeedScheduler()
+    feeds: dict[str, dict] = {}
+    for newspaper in newspapers:
+        if newspaper["rss_url"] and newspaper["rss_url"] != "hvg360":
+            feeds[str(newspaper["id"])] = newspaper
+            scheduler.add(str(newspaper["id"]))
+
+    pending: dict[Future, FeedState] = {}
+    with ThreadPoolExecutor(max_workers=RSS_WORKERS) as pool:
+        while True:
+            # due feeds are popped from the scheduler, so a feed is never fetched twice at once
+            for state in scheduler.pop_due():
+                newspaper = feeds[state.key]
+                dont_convert: bool = newspaper["name"] in ["Pécsi Stop"]
+                future: Future = pool.submit(
+                    get_new_from_rss, newspaper, newspapers, dont_convert, state
+                )
+                pending[future] = state
+
+            if not pending:
+                # wait returns immediately without futures
+                sleep(scheduler.seconds_until_due())
+                continue
+            done, _ = wait(
+                pending,
+                timeout=scheduler.seconds_until_due(),
+                return_when=FIRST_COMPLETED,
+            )
+            # the articles of each feed are inserted as soon as its fetch finishes
+            for future in done:
+                state = pending.pop(future)
+                newspaper = feeds[state.key]
+                # the poll is recorded in the state by get_new_from_rss, also when it fails
                 try:
-                    articles += get_new_from_rss(newspaper, newspapers, dont_convert)
+                    insert_articles(future.result())
                 except requests.exceptions.JSONDecodeError:
                     logging.error("JSONDecodeError for " + newspaper["name"])
+                    state.reset_validators()
                 except Exception as e:
                     logging.error("Error for " + newspaper["name"] + ": " + str(e))
+                    # the entries were not stored, so the unchanged feed must be parsed again
+                    state.reset_validators()
+                scheduler.schedule(state)
 
-        articles.sort(key=lambda x: x["release_date"] or "")
-        print([a["release_date"] for a in articles])
-        for article in articles:
-            logging.info(article)
-            with db.connection_pool.get_connection() as connection:
-                if not db.check_url_exists(connection, article["clean_url"]) and not skip_url(
-                    article["clean_url"]
-                ) and not re.fullmatch(r'.*\/\d{4}\/\d{2}', article["clean_url"]):
-                    db.init_news(
-                        connection,
-                        "rss",
-                        article["url"],
-                        article["clean_url"],
-                        article["newspaper"],
-                        article["newspaper_id"],
-                        1,
-                        article["release_date"],
-                    )
+
+def insert_articles(articles: list[dict]) -> None:
+    # another feed may have inserted the same url since the articles were found
+    articles = [a for a in articles if a["clean_url"] not in seen_urls]
+    if not articles:
+        return
+    # inserted in the order of publication
+    articles.sort(key=lambda x: x["release_date"] or "")
+    for article in articles:
+        logging.info(article)
+    with db.connection_pool.get_connection() as connection:
+        db.init_news_batch(
+            connection,
+            "rss",
+            [
+                {
+                    "source_url": article["url"],
+                    "clean_url": article["clean_url"],
+                    "newspaper_name": article["newspaper"],
+                    "newspaper_id": article["newspaper_id"],
+                    "pub_time": article["release_date"],
+                }
+                for article in articles
+            ],
+            1,
+        )
+    seen_urls.update(article["clean_url"] for article in articles)
 
 
 def skip_url(url) -> bool:
@@ -78,8 +122,8 @@ def skip_url(url) -> bool:
 
 def get_atv():
     logging.info("checking atv")
-    response: requests.Response = scraper.get(
-        f"https://api.atv.hu/cms/layout-version/published"
+    response: requests.Response = get_scraper().get(
+        f"https://api.atv.hu/cms/layout-version/published", timeout=RSS_TIMEOUT
     )
     if (
         "generator"
@@ -98,13 +142,33 @@ def get_atv():
     return urls_dates
 
 
-def get_rss(rssurl, dont_convert: bool = False):
+def get_rss(rssurl, dont_convert: bool = False, state: Optional[FeedState] = None):
+    """
+    Fetches and parses an RSS feed. With the state of the feed the request is conditional, and
+    the feed is only parsed if the content changed since the last fetch.
+
+    Returns:
+        List of (clean_url, pub_time) tuples of the entries, None if the feed is unchanged or
+        could not be fetched.
+    """
     try:
-        response = scraper.get(rssurl)
+        response = get_scraper().get(
+            rssurl,
+            headers=state.request_headers() if state else None,
+            timeout=RSS_TIMEOUT,
+        )
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        if state:
+            state.update_validators(response.headers)
+            # some servers ignore the conditional headers but serve identical content
+            if not state.is_changed(response.content):
+                return None
         feed = feedparser.parse(response.content)
     except Exception as e:
         logging.error(f"Error fetching RSS feed {rssurl}: {str(e)}")
-        return []
+        return None
 
     urls_dates = []
     for entry in feed.entries:
@@ -152,18 +216,48 @@ def get_rss(rssurl, dont_convert: bool = False):
     return urls_dates
 
 
-def get_new_from_rss(newspaper, newspapers, dont_convert: bool = False):
+def get_new_from_rss(
+    newspaper, newspapers, dont_convert: bool = False, state: Optional[FeedState] = None
+):
     articles_found = 0
     articles = []
 
-    urls_dates: list[tuple[str, Optional[str]]] = []
+    urls_dates: Optional[list[tuple[str, Optional[str]]]] = []
     if newspaper["rss_url"] == "hvg360":
         return []
-    if newspaper["rss_url"] == "atv":
-        urls_dates = get_atv()
-    else:
-        urls_dates = get_rss(newspaper["rss_url"], dont_convert)
+    try:
+        if newspaper["rss_url"] == "atv":
+            urls_dates = get_atv()
+        else:
+            urls_dates = get_rss(newspaper["rss_url"], dont_convert, state)
+    except Exception:
+        # a failed fetch is a poll without new entries, the feed backs off
+        if state:
+            state.record_poll(0)
+        raise
+    if state:
+        # the interval of the feed adapts to how many entries appeared since the last poll
+        new_links: set[str] = (
+            state.new_links([url for url, _ in urls_dates]) if urls_dates else set()
+        )
+        state.record_poll(len(new_links))
+    if not urls_dates:
+        return []
+    candidates: dict[str, tuple[str, Any]] = {}
     for url, release_date in urls_dates:
+        clean_url: str = clear_url(url)
+        if not skip_url(clean_url) and not re.fullmatch(r'.*\/\d{4}\/\d{2}', clean_url):
+            candidates.setdefault(clean_url, (url, release_date))
+    # only the urls not seen recently are checked in the database, all of them in one query
+    unseen: list[str] = seen_urls.unseen(candidates)
+    if unseen:
+        with db.connection_pool.get_connection() as connection:
+            existing: set[str] = db.get_existing_urls(connection, unseen)
+        seen_urls.update(existing)
+        unseen = [clean_url for clean_url in unseen if clean_url not in existing]
+
+    for clean_url in unseen:
+        url, release_date = candidates[clean_url]
         if '/360/' in url:
             newspaper360 = next((
                 n for n in newspapers if n["name"] == "HVG360"
@@ -182,22 +276,15 @@ def get_new_from_rss(newspaper, newspapers, dont_convert: bool = False):
             ), None)
             if newspaper_g7:
                 newspaper = newspaper_g7
-        # parsed_date = datetime.strptime(release_date, '%Y-%m-%dT%H:%M:%S.%f%z')
-        # pub_time = parsed_date.astimezone(ZoneInfo("Europe/Budapest"))
-        clean_url: str = clear_url(url)
-        with db.connection_pool.get_connection() as connection:
-            if not db.check_url_exists(connection, clean_url) and not skip_url(
-                clean_url
-            ) and not re.fullmatch(r'.*\/\d{4}\/\d{2}', clean_url):
-                article = {
-                    "url": url.strip().rstrip('/'),
-                    "clean_url": clean_url,
-                    "newspaper": newspaper["name"],
-                    "newspaper_id": newspaper["id"],
-                    "release_date": release_date.isoformat() if release_date else None
-                }
-                articles.append(article)
-                articles_found += 1
+        article = {
+            "url": url.strip().rstrip('/'),
+            "clean_url": clean_url,
+            "newspaper": newspaper["name"],
+            "newspaper_id": newspaper["id"],
+            "release_date": release_date.isoformat() if release_date else None
+        }
+        articles.append(article)
+        articles_found += 1
 
     if articles_found > 0:
         logging.info(newspaper["name"] + " found " + str(articles_found) + " articles")
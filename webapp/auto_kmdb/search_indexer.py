@@ -0,0 +1,105 @@
+from datetime import datetime
+from time import sleep
+from typing import Optional
+import logging
+import os
+
+from auto_kmdb import db
+from auto_kmdb.utils.search_index import SearchIndex, get_search_index
+
+# seconds between polls of the articles modified since the last poll
+SEARCH_INDEX_POLL_INTERVAL: float = float(
+    os.environ.get("SEARCH_INDEX_POLL_INTERVAL", "30")
+)
+# number of articles indexed per query, while the index is first loaded and when polling changes
+SEARCH_INDEX_BATCH_SIZE: int = 5000
+# seconds the changes are polled behind, transactions committed this late are still indexed
+SEARCH_INDEX_LAG: int = 10
+
+WATERMARK_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+
+def search_indexer(app_context):
+    """
+    Keeps the full-text search index up to date: loads all articles in batches on the first run,
+    after that indexes the articles added or modified since the last indexed change.
+    """
+    logging.info("Started search indexer")
+    app_context.push()
+    index: Optional[SearchIndex] = get_search_index()
+    if index is None:
+        return
+    while True:
+        try:
+            if index.complete:
+                if not sync_changes(index):
+                    sleep(SEARCH_INDEX_POLL_INTERVAL)
+            elif not load_batch(index):
+                sleep(SEARCH_INDEX_POLL_INTERVAL)
+        except Exception as e:
+            logging.error(f"Error updating search index: {e}")
+            sleep(SEARCH_INDEX_POLL_INTERVAL)
+
+
+def load_batch(index: SearchIndex) -> bool:
+    """
+    Indexes the next batch of articles of the first load.
+
+    Returns:
+        Whether there may be more articles to load.
+    """
+    with db.connection_pool.get_connection() as connection:
+        if index.get_meta("load_after_id") is None:
+            # the watermark is queried first, so changes during the load are polled again later
+            max_mod_time: datetime = db.get_news_watermark(connection)
+            index.set_meta(
+                {
+                    "load_after_id": 0,
+                    "synced_mod_time": max_mod_time.strftime(WATERMARK_FORMAT),
+                    "synced_id": 0,
+                }
+            )
+        after_id: int = int(index.get_meta("load_after_id"))
+        rows: list[dict] = db.get_news_for_search_index(
+            connection, after_id, SEARCH_INDEX_BATCH_SIZE
+        )
+    if not rows:
+        index.set_meta({"complete": 1})
+        logging.info(f"search index loaded up to article {after_id}")
+        return False
+    index.add(rows)
+    index.set_meta({"load_after_id": rows[-1]["id"]})
+    return True
+
+
+def sync_changes(index: SearchIndex) -> bool:
+    """
+    Indexes the next batch of articles added or modified after the last indexed change, in
+    (mod_time, id) order.
+
+    Returns:
+        Whether there may be more changes to index.
+    """
+    synced_mod_time: datetime = datetime.strptime(
+        index.get_meta("synced_mod_time"), WATERMARK_FORMAT
+    )
+    synced_id: int = int(index.get_meta("synced_id"))
+    with db.connection_pool.get_connection() as connection:
+        rows: list[dict] = db.get_news_search_changes(
+            connection,
+            synced_mod_time,
+            synced_id,
+            SEARCH_INDEX_BATCH_SIZE,
+            SEARCH_INDEX_LAG,
+        )
+    if not rows:
+        return False
+    indexed: int = index.add(rows)
+    index.set_meta(
+        {
+            "synced_mod_time": rows[-1]["mod_time"].strftime(WATERMARK_FORMAT),
+            "synced_id": rows[-1]["id"],
+        }
+    )
+    logging.debug(f"indexed {indexed} of {len(rows)} changed articles for search")
+    return len(rows) == SEARCH_INDEX_BATCH_SIZE
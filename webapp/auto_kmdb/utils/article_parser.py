@@ -0,0 +1,211 @@
+"""
+Parsing of downloaded articles. Kept apart from the download processor so the processes of the
+parse pool can import it without the database and the web app, see DownloadProcessor.parse.
+"""
+
+from datetime import datetime
+from datetime import timezone
+from typing import NamedTuple, Optional
+import logging
+import os
+import threading
+
+from bs4 import BeautifulSoup
+import cloudscraper
+import newspaper
+import requests
+
+from auto_kmdb.newspapers import get_newspaper
+from auto_kmdb.newspapers.HtmlDocument import HtmlDocument
+from auto_kmdb.newspapers.Newspaper import Newspaper
+from auto_kmdb.utils.preprocess import (
+    normalize_text,
+    remove_common_descriptions,
+    trim_title,
+)
+from auto_kmdb.utils.same_news import same_news
+
+
+class ArticleDownload(NamedTuple):
+    text: str
+    title: str
+    description: str
+    authors: str
+    date: Optional[datetime]
+    is_paywalled: int
+    same_news_id: Optional[int]
+
+
+proxy_host: str = os.environ["MYSQL_HOST"]
+request_proxies: dict[str, str] = {
+    "http": "socks5h://" + proxy_host + ":1080",
+    "https": "socks5h://" + proxy_host + ":1080",
+}
+newspaper_config = newspaper.configuration.Configuration()
+newspaper_config.update(fetch_images=False)
+
+# requests sessions are not thread-safe, every downloading thread gets its own scraper
+scraper_local = threading.local()
+
+
+def get_scraper() -> cloudscraper.CloudScraper:
+    """Returns the cloudscraper session of the calling thread, using the proxy."""
+    if getattr(scraper_local, "scraper", None) is None:
+        scraper_local.scraper = cloudscraper.create_scraper(browser="chrome")
+        scraper_local.scraper.proxies.update(request_proxies)
+    return scraper_local.scraper
+
+
+def init_parse_worker() -> None:
+    """Logs the parse pool processes to the log file of the app."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        filename=os.environ.get("LOG_PATH", "data/log.txt"),
+    )
+
+
+def get_custom_text(doc: HtmlDocument, paper: Optional[Newspaper]) -> Optional[str]:
+    if paper:
+        return paper.get_text(doc)
+
+
+def get_custom_description(doc: HtmlDocument, paper: Optional[Newspaper]) -> Optional[str]:
+    if paper:
+        return paper.get_description(doc)
+
+
+def get_custom_title(doc: HtmlDocument, paper: Optional[Newspaper]) -> Optional[str]:
+    if paper:
+        return paper.get_title(doc)
+
+
+def process_article(
+    url: str, html: str, cookies: dict[str, str], skip_paywalled=False
+) -> ArticleDownload:
+    article = newspaper.Article(url=url, config=newspaper_config)
+    article.download(
+        input_html=html.replace("<br>", "\n"),
+    )
+    article.parse()
+
+    text: str = article.text
+    title: str = article.title
+    is_paywalled: int = 0
+
+    if not skip_paywalled:
+        if "Csatlakozz a Körhöz, és olvass tovább!" in article.html:
+            logging.info("found paywalled 444 article")
+            text = get_444(url.split("?")[0], cookies)
+            is_paywalled = 1
+        elif "hvg.hu/360/" in url:
+            logging.info("found paywalled hvg360 article")
+            try:
+                text += "\n" + get_hvg(url.split("/360/")[1].split("?")[0])
+            except Exception as e:
+                logging.error("Error fetching HVG360 article: " + str(e))
+            is_paywalled = 1
+
+    # parsed at most once, shared by the hooks of the newspaper plugin
+    doc = HtmlDocument(url, article.html)
+    paper: Optional[Newspaper] = get_newspaper(url)
+
+    try:
+        custom_text: Optional[str] = get_custom_text(doc, paper)
+        if custom_text:
+            text = custom_text
+    except Exception as e:
+        logging.error(e)
+
+    try:
+        custom_title = get_custom_title(doc, paper)
+        if custom_title:
+            title = custom_title
+    except Exception as e:
+        logging.error(e)
+
+    title = trim_title(title)
+    title = normalize_text(title).strip()
+    text = normalize_text(text).strip()
+
+    authors: str = ",".join([a for a in article.authors if " " in a])
+
+    description: str = remove_common_descriptions(article.meta_description)
+
+    try:
+        custom_description: Optional[str] = get_custom_description(doc, paper)
+        if custom_description:
+            description = custom_description
+    except Exception as e:
+        logging.error(e)
+
+    if len(description) < 1 and text.count("\n") > 1:
+        article_lines: str = text.splitlines()[0]
+        description = article_lines[: article_lines[:400].rfind(".") + 1]
+        if "." not in article_lines[:400]:
+            description = article_lines[:400]
+
+    date: Optional[datetime] = None
+    if article.publish_date:
+        date = article.publish_date.astimezone(timezone.utc)
+
+    same_news_id: Optional[int] = same_news(title, description, text)
+
+    if not title:
+        logging.warning("Title is empty")
+        raise Exception("Title is empty")
+
+    paywall_texts = [
+        "Csatlakozz a Körhöz, és olvass tovább!",
+        "A teljes cikket előfizetőink olvashatják el.",
+        "A keresett cikk a portfolio.hu hírarchívumához tartozik, melynek olvasása előfizetéses regisztrációhoz kötött.",
+        "Ez a cikk folytatódik, de csak Portfolio Signature előfizetéssel olvasható tovább.",
+        "Ez egy remek cikk a nyomtatott Magyar Narancsból, amely online is elérhető.",
+        "A cikk innentől csak a Qubit+ előfizetőinek elérhető. Csatlakozz, és olvass tovább!",
+    ]
+
+    if "hvg.hu/360/" in url or any([text in article.html for text in paywall_texts]):
+        is_paywalled = 1
+
+    return ArticleDownload(
+        text, title, description, authors, date, is_paywalled, same_news_id
+    )
+
+
+def get_444(url: str, cookies: dict[str, str]) -> str:
+    article_name: str = url.split("/")[-1]
+    date: str = "-".join(url.split("/")[-4:-1])
+    bucket = "444"
+    if url.count("/") == 7:
+        bucket: str = url.split("/")[3]
+
+    response: requests.Response = get_scraper().get(
+        f"https://gateway.ipa.444.hu/api/graphql?crunch=2&operationName=fetchContent&variables=%7B%22onlyReports%22%3Afalse%2C%22order%22%3A%22DESC%22%2C%22slug%22%3A%22{article_name}%22%2C%22date%22%3A%22{date}%22%2C%22buckets%22%3A%5B%22{bucket}%22%5D%2C%22cursorInclusive%22%3Afalse%7D&extensions=%7B%22persistedQuery%22%3A%7B%22version%22%3A1%2C%22sha256Hash%22%3A%22376c5324c94249caa29a66aeb02f8ed7c593ce2d9036098f1ba63a545405c96a%22%7D%7D",
+        cookies=cookies,
+    )
+    text: str = "\n".join(
+        [
+            BeautifulSoup(f["content"], features="lxml").text
+            for f in response.json()["data"]["crunched"][-1]["content"]["body"][0]
+            if isinstance(f, dict) and "content" in f
+        ]
+    )
+
+    return text
+
+
+def get_hvg(webid: str) -> str:
+    token: str = os.environ["TOKEN_HVG"]
+    response: requests.Response = get_scraper().get(
+        f"https://api.hvg.hu/web//articles/premiumcontent/?webid={webid}&apiKey=4f67ed9596ac4b11a4b2ac413e7511af",
+        headers={"Authorization": "Bearer " + token},
+    )
+    soup = BeautifulSoup(response.json(), features="lxml")
+    premium_text: str = "\n".join([t.text for t in soup.find_all("p")])
+    premium_text: str = premium_text.replace(
+        "A hvg360 tartalma, így a fenti cikk is, olyan érték, ami nem jöhetett volna létre a te előfizetésed nélkül. Ha tetszett az írásunk, akkor oszd meg a minőségi újságírás élményét szeretteiddel is, és ajándékozz hvg360-előfizetést!",
+        "",
+    )
+
+    return premium_text
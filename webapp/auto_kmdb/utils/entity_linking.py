@@ -1,25 +1,43 @@
 import warnings
 from functools import cache
 import gc
+import os
+import threading
+from time import monotonic
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 import pandas as pd
 import numpy as np
 from typing import Literal, Optional, Sequence
 import logging
+import ahocorasick
+from cachetools import cached, LRUCache
 from spacy.language import Language
 
-from auto_kmdb.db import connection_pool
 from auto_kmdb.db import (
-    get_all_persons_freq,
-    get_all_institutions_freq,
-    get_all_places_freq,
-    get_all_places,
-    get_all_institutions,
+    query_all_freq,
+    get_label_watermark,
+    get_label_changes,
+    get_label_counts,
 )
 
+# seconds between two polls of the keyword tables for new or modified keywords
+KEYWORD_POLL_INTERVAL: float = float(os.environ.get("KEYWORD_POLL_INTERVAL", "60"))
+# seconds between two full reloads, these also refresh the counts of the unchanged keywords
+KEYWORD_FULL_RELOAD_INTERVAL: float = float(
+    os.environ.get("KEYWORD_FULL_RELOAD_INTERVAL", "86400")
+)
+# number of detected entity surface forms whose lemmas are kept in memory
+LEMMA_CACHE_SIZE: int = int(os.environ.get("LEMMA_CACHE_SIZE", "100000"))
+
+# table, id column and name column of the keywords of each entity type
+KEYWORD_TABLES: dict[str, tuple[str, str, str]] = {
+    "people": ("news_persons", "person_id", "name"),
+    "institutions": ("news_institutions", "institution_id", "name"),
+    "places": ("news_places", "place_id", "name_hu"),
+}
+
 
-@cache
 def get_synonyms_file(
     entity_type: Literal["places", "institutions"] = "places"
 ) -> pd.DataFrame:
@@ -34,6 +52,16 @@ def get_synonyms_file(
         Dataframe indexed by aliases and contianing a column 'db_keyword' the alias belongs to.
         Aliases must be unique.
     """
+    store: KeywordStore = get_keyword_store(entity_type)
+    store.refresh()
+    return _load_synonyms_file(entity_type, store.version)
+
+
+@cached(cache=LRUCache(maxsize=4))
+def _load_synonyms_file(
+    entity_type: Literal["places", "institutions"], version: int
+) -> pd.DataFrame:
+    # version is part of the cache key, so the aliases are re-resolved if a keyword changes
     synonym_file = (
         pd.read_csv(f"data/{entity_type}_synonym.csv", index_col=[0])
         .drop(
@@ -52,15 +80,7 @@ def get_synonyms_file(
     synonym_mapping = pd.DataFrame(columns=["db_keyword"])
     synonym_mapping.index.name = "entity"
 
-    with connection_pool.get_connection() as connection:
-        if entity_type == "places":
-            db_entities = get_all_places()
-        elif entity_type == "institutions":
-            db_entities = get_all_institutions()
-
-    entity_dict = {}
-    for e in db_entities:
-        entity_dict[e["id"]] = e["name"]
+    entity_dict = get_keyword_store(entity_type).get_names()
 
     for col in synonym_file.columns:
         if str(col) == "nan":
@@ -78,12 +98,12 @@ def get_synonyms_file(
     return synonym_mapping
 
 
-@cache
 def get_entities_freq(
     type: Literal["people", "places", "institutions"]
 ) -> pd.DataFrame:
     """
-    Queries entitites from database and counts their occurrances on articles.
+    Returns the entities of the database and the number of their occurrances on articles, as
+    held by the KeywordStore of the type after refreshing it.
 
     Args:
         type: type of entity to query, must have value of either 'people', 'places', or
@@ -92,37 +112,396 @@ def get_entities_freq(
     Returns:
         Dataframe indexed by db keyword names, containing 'id' and 'count' column.
     """
-    with connection_pool.get_connection() as connection:
-        if type == "people":
-            db_entities = get_all_persons_freq()
-        elif type == "places":
-            db_entities = get_all_places_freq()
-        elif type == "institutions":
-            db_entities = get_all_institutions_freq()
+    store: KeywordStore = get_keyword_store(type)
+    store.refresh()
+    return store.get_frame()
+
+
+class KeywordIndex:
+    """
+    Precomputed lookup structures over the db keyword names, answering the keyword rules of
+    get_mapping without scanning the whole keyword list for every entity. Results are identical
+    to get_identical_keywords, get_containing_keywords and the 'entity contains keyword' rule,
+    including the order of the returned keywords.
+
+    Structures (all on the lowercase names):
+        - hash map for exact matches
+        - character n-gram index for keywords containing the entity
+        - Aho-Corasick automaton for keywords contained in the entity
+
+    Args:
+        keyword_list: list of db keyword names, the order of the list is the order of the results
+    """
+
+    NGRAM: int = 3
+
+    def __init__(self, keyword_list: Sequence[str]) -> None:
+        self._order: dict[str, int] = {}
+        self._lower: dict[str, str] = {}
+        self._exact: dict[str, list[str]] = {}
+        self._ngrams: dict[str, set[str]] = {}
+        self._automaton = ahocorasick.Automaton()
+        self._automaton_dirty: bool = False
+        for position, keyword in enumerate(keyword_list):
+            self.add(keyword, position)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _ngrams_of(self, lower: str) -> set[str]:
+        return {lower[i : i + self.NGRAM] for i in range(len(lower) - self.NGRAM + 1)}
+
+    def _sorted(self, keywords) -> list[str]:
+        return sorted(keywords, key=self._order.__getitem__)
+
+    def add(self, keyword: str, order: int) -> None:
+        """
+        Adds a keyword to the index.
+
+        Args:
+            keyword: db keyword name
+            order: sort key of the keyword in the results, e.g. its position in the keyword list
+        """
+        if keyword in self._order:
+            self.remove(keyword)
+        lower: str = keyword.lower()
+        self._order[keyword] = order
+        self._lower[keyword] = lower
+        self._exact.setdefault(lower, []).append(keyword)
+        for ngram in self._ngrams_of(lower):
+            self._ngrams.setdefault(ngram, set()).add(keyword)
+        self._automaton_dirty = True
+
+    def remove(self, keyword: str) -> None:
+        """
+        Removes a keyword from the index, does nothing if it is not indexed.
+
+        Args:
+            keyword: db keyword name
+        """
+        if keyword not in self._order:
+            return
+        lower: str = self._lower.pop(keyword)
+        del self._order[keyword]
+        self._exact[lower].remove(keyword)
+        if not self._exact[lower]:
+            del self._exact[lower]
+        for ngram in self._ngrams_of(lower):
+            self._ngrams[ngram].discard(keyword)
+            if not self._ngrams[ngram]:
+                del self._ngrams[ngram]
+        self._automaton_dirty = True
+
+    def _get_automaton(self):
+        # the automaton is rebuilt lazily, so a batch of add/remove calls costs a single build
+        if self._automaton_dirty:
+            self._automaton = ahocorasick.Automaton()
+            for lower in self._exact:
+                if lower:
+                    self._automaton.add_word(lower, lower)
+            self._automaton.make_automaton()
+            self._automaton_dirty = False
+        return self._automaton
+
+    def identical(self, entity: str) -> list[str]:
+        """Same as get_identical_keywords over the indexed keywords."""
+        keywords: Optional[list[str]] = self._exact.get(entity.lower())
+        if not keywords:
+            return []
+        return [min(keywords, key=self._order.__getitem__)]
+
+    def containing(self, entity: str) -> list[str]:
+        """Same as get_containing_keywords over the indexed keywords."""
+        lower: str = entity.lower()
+        ngrams: list[set[str]] = sorted(
+            (self._ngrams.get(ngram, set()) for ngram in self._ngrams_of(lower)),
+            key=len,
+        )
+        if not ngrams:
+            # entity is shorter than the n-grams, nothing to narrow down with
+            candidates = self._order.keys()
         else:
+            candidates = set.intersection(*ngrams) if ngrams[0] else set()
+        return self._sorted(k for k in candidates if lower in self._lower[k])
+
+    def contained_in(self, entity: str) -> list[str]:
+        """
+        Returns the keywords (other than the entity itself) that the entity contains, the same as
+        checking get_containing_keywords(keyword, [entity]) for every keyword.
+        """
+        lower: str = entity.lower()
+        found: set[str] = set(self._exact.get("", []))
+        automaton = self._get_automaton()
+        if len(automaton) > 0:
+            for _, keyword_lower in automaton.iter(lower):
+                found.update(self._exact[keyword_lower])
+        found.discard(entity)
+        return self._sorted(found)
+
+
+class KeywordStore:
+    """
+    In-memory copy of the keywords of an entity type and their usage counts, together with the
+    KeywordIndex over their names.
+
+    The keywords are loaded once with a full aggregation, after which only the rows of the keyword
+    table with a newer mod_time or a larger id are polled, and only their counts are queried. The
+    counts of unchanged keywords are refreshed by a full reload every
+    KEYWORD_FULL_RELOAD_INTERVAL seconds. The version is incremented whenever the keywords change,
+    so derived data (e.g. the synonym mapping) can be cached per version.
+
+    Args:
+        entity_type: type of the keywords, must have value of either 'people', 'places', or
+        'institutions'
+    """
+
+    def __init__(self, entity_type: Literal["people", "places", "institutions"]) -> None:
+        if entity_type not in KEYWORD_TABLES:
             raise ValueError(
                 "type parameter should be one of the following: 'people', 'places', 'institutions'"
             )
-    db_entities = (
-        pd.DataFrame(db_entities)
-        .convert_dtypes(
-            {"name": str, "id": int, "count": int},
+        self.entity_type = entity_type
+        self.table, self.id_column, self.name_column = KEYWORD_TABLES[entity_type]
+        self.version: int = 0
+        self.index: KeywordIndex = KeywordIndex([])
+        self._lock = threading.RLock()
+        # id -> {"name": ..., "count": ...} of the keywords with status Y
+        self._entities: dict[int, dict] = {}
+        self._ids_by_name: dict[str, set[int]] = {}
+        self._max_mod_time: int = 0
+        self._max_id: int = 0
+        self._last_poll: Optional[float] = None
+        self._last_full_load: Optional[float] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._frame_version: int = -1
+
+    def refresh(self) -> int:
+        """
+        Applies the changes of the keyword table if the poll interval has passed, or reloads the
+        whole table if the full reload interval has passed.
+
+        Returns:
+            The version of the store after the refresh.
+        """
+        with self._lock:
+            now: float = monotonic()
+            if (
+                self._last_full_load is None
+                or now - self._last_full_load >= KEYWORD_FULL_RELOAD_INTERVAL
+            ):
+                self._full_load()
+                self._last_full_load = self._last_poll = now
+            elif now - self._last_poll >= KEYWORD_POLL_INTERVAL:
+                self._apply_changes()
+                self._last_poll = now
+            return self.version
+
+    def _full_load(self) -> None:
+        # the watermark is queried first, so changes during the load are polled again later
+        self._max_mod_time, self._max_id = get_label_watermark(
+            self.table, self.id_column
+        )
+        rows: list[dict] = query_all_freq(self.table, self.id_column, self.name_column)
+        self._entities = {}
+        self._ids_by_name = {}
+        self.index = KeywordIndex([])
+        for row in rows:
+            self._set(row["id"], row["name"], row["count"])
+        self.version += 1
+        logging.info(
+            f"loaded {len(self._entities)} {self.entity_type} keywords, version {self.version}"
         )
-        .drop_duplicates(
-            subset="name"
-        )  # TODO: remove this line after DB has been cleaned
-        .dropna()  # TODO: remove this line after DB has been cleaned
-    )
 
-    for col in db_entities.columns:
-        assert (~db_entities[col].isna()).all(), (
-            type + " keyword " + col + " should not contain nans"
+    def _apply_changes(self) -> None:
+        rows: list[dict] = get_label_changes(
+            self.table,
+            self.id_column,
+            self.name_column,
+            self._max_mod_time,
+            self._max_id,
+        )
+        changed_ids: set[int] = set()
+        removed: int = 0
+        for row in rows:
+            self._max_mod_time = max(self._max_mod_time, int(row["mod_time"] or 0))
+            self._max_id = max(self._max_id, row["id"])
+            current: Optional[dict] = self._entities.get(row["id"])
+            if row["status"] == "Y":
+                if current is None or current["name"] != row["name"]:
+                    changed_ids.add(row["id"])
+            elif current is not None:
+                self._remove(row["id"])
+                removed += 1
+        counts: dict[int, int] = get_label_counts(
+            self.table, self.id_column, sorted(changed_ids)
         )
-    assert db_entities.name.is_unique, "Keyword names should be unique"
-    assert np.array(
-        [(";" not in str(entity_name)) for entity_name in db_entities.name]
-    ).all(), "entity names should not contain semicolons ';'"
-    return db_entities.set_index("name")
+        for row in rows:
+            if row["id"] in changed_ids:
+                self._set(row["id"], row["name"], counts.get(row["id"], 0))
+        if changed_ids or removed:
+            self.version += 1
+            logging.info(
+                f"applied {len(changed_ids)} new or renamed and {removed} removed "
+                f"{self.entity_type} keywords, version {self.version}"
+            )
+
+    def _set(self, entity_id: int, name: Optional[str], count: int) -> None:
+        if entity_id in self._entities:
+            self._remove(entity_id)
+        self._entities[entity_id] = {"name": name, "count": count}
+        if name is None:
+            return
+        ids: set[int] = self._ids_by_name.setdefault(name, set())
+        ids.add(entity_id)
+        # duplicate names are linked to the keyword with the smallest id
+        self.index.add(name, min(ids))
+
+    def _remove(self, entity_id: int) -> None:
+        name: Optional[str] = self._entities.pop(entity_id)["name"]
+        if name is None:
+            return
+        ids: set[int] = self._ids_by_name[name]
+        ids.discard(entity_id)
+        if ids:
+            self.index.add(name, min(ids))
+        else:
+            del self._ids_by_name[name]
+            self.index.remove(name)
+
+    def get_names(self) -> dict[int, str]:
+        """Returns the names of the keywords by their id."""
+        with self._lock:
+            return {
+                entity_id: entity["name"]
+                for entity_id, entity in self._entities.items()
+            }
+
+    def get_frame(self) -> pd.DataFrame:
+        """
+        Returns the keywords in the format of get_entities_freq, built once per version.
+
+        Returns:
+            Dataframe indexed by db keyword names, containing 'id' and 'count' column.
+        """
+        with self._lock:
+            if self._frame_version != self.version:
+                self._frame = self._build_frame()
+                self._frame_version = self.version
+            return self._frame
+
+    def _build_frame(self) -> pd.DataFrame:
+        db_entities = (
+            pd.DataFrame(
+                [
+                    {"id": entity_id, "name": entity["name"], "count": entity["count"]}
+                    for entity_id, entity in sorted(self._entities.items())
+                ],
+                columns=["id", "name", "count"],
+            )
+            .convert_dtypes(
+                {"name": str, "id": int, "count": int},
+            )
+            .drop_duplicates(
+                subset="name"
+            )  # TODO: remove this line after DB has been cleaned
+            .dropna()  # TODO: remove this line after DB has been cleaned
+        )
+
+        for col in db_entities.columns:
+            assert (~db_entities[col].isna()).all(), (
+                self.entity_type + " keyword " + col + " should not contain nans"
+            )
+        assert db_entities.name.is_unique, "Keyword names should be unique"
+        assert np.array(
+            [(";" not in str(entity_name)) for entity_name in db_entities.name]
+        ).all(), "entity names should not contain semicolons ';'"
+        return db_entities.set_index("name")
+
+
+@cache
+def get_keyword_store(
+    type: Literal["people", "places", "institutions"]
+) -> KeywordStore:
+    """
+    Returns the KeywordStore of the given entity type, shared by all callers.
+
+    Args:
+        type: type of entity, must have value of either 'people', 'places', or 'institutions'
+    """
+    return KeywordStore(type)
+
+
+def get_keyword_index(
+    type: Literal["people", "places", "institutions"]
+) -> KeywordIndex:
+    """
+    Returns the KeywordIndex of the db keywords of the given type. The store is not refreshed, so
+    the index matches the dataframe returned by the last get_entities_freq call.
+
+    Args:
+        type: type of entity to index, must have value of either 'people', 'places', or
+        'institutions'
+
+    Returns:
+        KeywordIndex of the names returned by get_entities_freq.
+    """
+    return get_keyword_store(type).index
+
+
+class LemmaCache:
+    """
+    Bounded LRU cache of detected entity surface form -> lemmatized form, the same names recur in
+    many articles. Missing forms are lemmatized together with nlp.pipe.
+
+    Args:
+        maxsize: maximum number of cached surface forms
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def lemmatize(self, words: Sequence[str], nlp: Language) -> list[str]:
+        """
+        Lemmatizes the given words, each token replaced by its lemma and joined by spaces.
+
+        Args:
+            words: detected entity names
+            nlp: spacy pipeline with a lemmatizer
+
+        Returns:
+            List of lemmatized names in the order of words.
+        """
+        lemmas: dict[str, str] = {}
+        with self._lock:
+            for word in words:
+                if word in lemmas:
+                    continue
+                lemma: Optional[str] = self._cache.get(word)
+                if lemma is not None:
+                    lemmas[word] = lemma
+                    self.hits += 1
+        missing: list[str] = list(dict.fromkeys(w for w in words if w not in lemmas))
+        if missing:
+            new_lemmas: dict[str, str] = {
+                word: " ".join([token.lemma_ for token in doc])
+                for word, doc in zip(missing, nlp.pipe(missing))
+            }
+            lemmas.update(new_lemmas)
+            with self._lock:
+                self.misses += len(missing)
+                self._cache.update(new_lemmas)
+        return [lemmas[word] for word in words]
+
+    def stats(self) -> dict[str, int]:
+        """Returns the number of hits, misses and cached forms."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+lemma_cache = LemmaCache(LEMMA_CACHE_SIZE)
 
 
 def get_identical_keywords(entity: str, keyword_list: Sequence[str]) -> list[str]:
@@ -202,6 +581,7 @@ def get_mapping(
     keyword_list: Sequence[str],
     nlp: Language,
     synonym_mapping: Optional[pd.DataFrame] = None,
+    keyword_index: Optional[KeywordIndex] = None,
 ) -> pd.DataFrame:
     """
     Receives the detected entities of a single article and a list of keywords taken from the DB.
@@ -231,6 +611,8 @@ def get_mapping(
         keyword list: list of db keyword names
         synonym_mapping: dataframe indexed by aliases, containing a single column named
             'db_keyword' that hold the name of the db keyword the alias belongs to, optional
+        keyword_index: prebuilt KeywordIndex of keyword_list, optional, built on the fly if
+            missing
 
     Returns:
         A dataframe indexed by the found entities, containing the proposed keyword mappings of the
@@ -248,30 +630,26 @@ def get_mapping(
     )
 
     mapping["detected_ent_raw"] = mapping["detected_ent"].copy()
-    mapping["detected_ent"] = mapping["detected_ent"].apply(
-        lambda word: " ".join([token.lemma_ for token in nlp(word)])
+    mapping["detected_ent"] = lemma_cache.lemmatize(
+        mapping["detected_ent"].tolist(), nlp
     )
     mapping = mapping.set_index("detected_ent")
-    for entity in mapping.index:
+    if keyword_index is None:
+        keyword_index = KeywordIndex(keyword_list)
+    # .at sets every row of a repeated entity, so each distinct entity is linked once
+    for entity in mapping.index.unique():
         mapping.at[entity, "from_article"] = "; ".join(
             [x for x in get_mapping_from_article(entity, mapping.index)]
         )
         mapping.at[entity, "identical_keyword"] = "; ".join(
-            [x for x in get_identical_keywords(entity, keyword_list)]
+            keyword_index.identical(entity)
         )
         mapping.at[entity, "keyword_contains_entity"] = "; ".join(
-            [x for x in get_containing_keywords(entity, keyword_list)]
+            keyword_index.containing(entity)
+        )
+        mapping.at[entity, "entity_contains_keyword"] = "; ".join(
+            keyword_index.contained_in(entity)
         )
-        entity_c_kw = []
-        [
-            (
-                entity_c_kw.append(kw)
-                if (len(get_containing_keywords(kw, [entity])) > 0) & (kw != entity)
-                else ""
-            )
-            for kw in keyword_list
-        ]
-        mapping.at[entity, "entity_contains_keyword"] = "; ".join(entity_c_kw)
 
         mapping.at[entity, "synonym_keyword"] = (
             "; ".join([x for x in get_mapping_by_synonym(entity.lower(), synonym_mapping)])
@@ -0,0 +1,152 @@
+from hashlib import sha1
+from time import time
+from typing import Optional
+import heapq
+import os
+
+# bounds of the polling interval of a feed in seconds, new feeds start at RSS_INITIAL_INTERVAL
+RSS_MIN_INTERVAL: float = float(os.environ.get("RSS_MIN_INTERVAL", "60"))
+RSS_MAX_INTERVAL: float = float(os.environ.get("RSS_MAX_INTERVAL", "1800"))
+RSS_INITIAL_INTERVAL: float = float(os.environ.get("RSS_INITIAL_INTERVAL", "120"))
+
+# weight of the latest poll in the moving average of the publish rate of a feed
+RATE_SMOOTHING: float = 0.3
+# the interval is chosen so about this many new entries are expected per poll
+ENTRIES_PER_POLL: float = 1.0
+# growth of the interval after a poll without new entries, while no rate is known
+BACKOFF: float = 1.5
+
+
+class FeedState:
+    """
+    Polling state of a single feed: the validators of its last response for conditional GET, the
+    hash of its last content, the links of its last entries and its adaptive polling interval.
+
+    Args:
+        key: identifier of the feed, e.g. its url
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key: str = key
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.links: set[str] = set()
+        # moving average of new entries per second, None until the first new entry is seen
+        self.rate: Optional[float] = None
+        self.interval: float = RSS_INITIAL_INTERVAL
+        self.last_poll: Optional[float] = None
+        self.next_due: float = 0.0
+
+    def request_headers(self) -> dict[str, str]:
+        """Returns the headers making the next request of the feed conditional."""
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update_validators(self, headers) -> None:
+        """Stores the ETag and Last-Modified headers of a successful response."""
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+
+    def reset_validators(self) -> None:
+        """
+        Forgets the validators and the content hash, so the next request of the feed is
+        unconditional and its content is parsed again, e.g. after its entries failed to be stored.
+        """
+        self.etag = None
+        self.last_modified = None
+        self.content_hash = None
+
+    def is_changed(self, content: bytes) -> bool:
+        """
+        Returns whether the content differs from the last content of the feed, for servers that
+        ignore the conditional headers. The hash of the content is stored.
+        """
+        content_hash: str = sha1(content).hexdigest()
+        changed: bool = content_hash != self.content_hash
+        self.content_hash = content_hash
+        return changed
+
+    def new_links(self, links: list[str]) -> set[str]:
+        """
+        Returns the links that were not in the feed at the last parse, and stores the links.
+        """
+        current: set[str] = set(links)
+        new: set[str] = current - self.links if self.links else set()
+        self.links = current
+        return new
+
+    def record_poll(self, new_entries: int, now: Optional[float] = None) -> None:
+        """
+        Adapts the polling interval to the observed publish rate of the feed and schedules the
+        next poll.
+
+        Args:
+            new_entries: number of entries that appeared since the last poll
+            now: time of the poll, defaults to the current time
+        """
+        now = time() if now is None else now
+        if self.last_poll is not None:
+            elapsed: float = max(now - self.last_poll, 1.0)
+            observed: float = new_entries / elapsed
+            if self.rate is None:
+                if new_entries:
+                    self.rate = observed
+            else:
+                self.rate = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * self.rate
+        if self.rate:
+            interval: float = ENTRIES_PER_POLL / self.rate
+        elif self.last_poll is not None and not new_entries:
+            interval = self.interval * BACKOFF
+        else:
+            interval = self.interval
+        self.interval = min(max(interval, RSS_MIN_INTERVAL), RSS_MAX_INTERVAL)
+        self.last_poll = now
+        self.next_due = now + self.interval
+
+
+class FeedScheduler:
+    """
+    Priority queue of feeds ordered by the time of their next poll, so only the feeds that are due
+    are woken.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, FeedState]] = []
+        self._counter: int = 0
+        self.feeds: dict[str, FeedState] = {}
+
+    def add(self, key: str) -> FeedState:
+        """Adds a feed, due immediately, and returns its state."""
+        state = FeedState(key)
+        self.feeds[key] = state
+        self.schedule(state)
+        return state
+
+    def schedule(self, state: FeedState) -> None:
+        """Queues the feed for its next_due time."""
+        # the counter keeps the ordering of feeds due at the same time stable
+        self._counter += 1
+        heapq.heappush(self._heap, (state.next_due, self._counter, state))
+
+    def pop_due(self, now: Optional[float] = None) -> list[FeedState]:
+        """
+        Removes and returns the feeds that are due. They must be queued again with schedule after
+        they have been polled.
+        """
+        now = time() if now is None else now
+        due: list[FeedState] = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def seconds_until_due(self, now: Optional[float] = None) -> float:
+        """Returns the number of seconds until the next feed is due, 0 if one is already due."""
+        if not self._heap:
+            return RSS_MAX_INTERVAL
+        now = time() if now is None else now
+        return max(self._heap[0][0] - now, 0.0)
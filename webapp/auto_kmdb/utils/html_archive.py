@@ -0,0 +1,142 @@
+from hashlib import sha256
+from time import time
+from typing import Iterator, Optional
+import os
+import sqlite3
+import threading
+
+import zstandard
+
+# directory of the archive of the downloaded html, see HtmlArchive
+HTML_ARCHIVE_DIR: str = os.environ.get("HTML_ARCHIVE_DIR", "data/html_archive")
+
+
+class HtmlArchive:
+    """
+    On-disk archive of downloaded raw html, so articles can be parsed again without network.
+
+    Every distinct html is stored once, zstd compressed, in a file named by the sha256 of its
+    content (blobs/ab/cd/<sha256>.zst). A SQLite index maps urls to the hashes of their fetches,
+    so the latest html of a url is found with a single index lookup.
+
+    Args:
+        directory: root directory of the archive
+    """
+
+    def __init__(self, directory: str = HTML_ARCHIVE_DIR) -> None:
+        self.directory: str = directory
+        self._local = threading.local()
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT NOT NULL, sha256 TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_pages_url ON pages (url, fetched_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections and zstd contexts can't be shared between threads
+        if getattr(self._local, "connection", None) is None:
+            self._local.connection = sqlite3.connect(
+                os.path.join(self.directory, "index.sqlite"), timeout=30
+            )
+            self._local.compressor = zstandard.ZstdCompressor(level=10)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.connection
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(
+            self.directory,
+            "blobs",
+            content_hash[:2],
+            content_hash[2:4],
+            f"{content_hash}.zst",
+        )
+
+    def put(self, url: str, html: str) -> str:
+        """
+        Stores the html of a fetch of the url, the content is only written if it is new.
+
+        Args:
+            url: url the html has been downloaded from, the clean_url for articles
+            html: downloaded html
+
+        Returns:
+            The sha256 hex digest of the html.
+        """
+        connection: sqlite3.Connection = self._connect()
+        content: bytes = html.encode("utf-8")
+        content_hash: str = sha256(content).hexdigest()
+        path: str = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # written under a temporary name first, so readers never see a partial blob
+            tmp_path: str = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._local.compressor.compress(content))
+            os.replace(tmp_path, path)
+        with connection:
+            connection.execute(
+                "INSERT INTO pages (url, sha256, fetched_at) VALUES (?, ?, ?)",
+                (url, content_hash, time()),
+            )
+        return content_hash
+
+    def get_by_hash(self, content_hash: str) -> Optional[str]:
+        """
+        Returns the html with the given sha256 hex digest, None if it is not archived.
+        """
+        self._connect()
+        path: str = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return self._local.decompressor.decompress(f.read()).decode("utf-8")
+
+    def get_hash(self, url: str) -> Optional[str]:
+        """
+        Returns the sha256 hex digest of the latest archived html of the url, None if the url has
+        not been archived.
+        """
+        row: Optional[tuple] = (
+            self._connect()
+            .execute(
+                "SELECT sha256 FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Returns the latest archived html of the url, None if the url has not been archived.
+        """
+        content_hash: Optional[str] = self.get_hash(url)
+        if content_hash is None:
+            return None
+        return self.get_by_hash(content_hash)
+
+    def has(self, url: str) -> bool:
+        """Returns whether the url has been archived."""
+        return self.get_hash(url) is not None
+
+    def urls(self) -> Iterator[str]:
+        """Iterates over the archived urls."""
+        for (url,) in self._connect().execute("SELECT DISTINCT url FROM pages"):
+            yield url
+
+
+html_archive: Optional[HtmlArchive] = None
+html_archive_lock = threading.Lock()
+
+
+def get_html_archive() -> HtmlArchive:
+    """Returns the archive in HTML_ARCHIVE_DIR, shared by the whole process."""
+    global html_archive
+    with html_archive_lock:
+        if html_archive is None:
+            html_archive = HtmlArchive()
+        return html_archive
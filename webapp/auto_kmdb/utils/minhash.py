@@ -0,0 +1,80 @@
+from functools import lru_cache
+from typing import Iterable
+import os
+import re
+
+from datasketch import MinHash
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import SnowballStemmer
+
+# Download required NLTK data
+try:
+    nltk.data.find("corpora/stopwords")
+except LookupError:
+    nltk.download("stopwords")
+
+# Initialize Hungarian stemmer and stopwords
+hungarian_stemmer = SnowballStemmer("hungarian")
+try:
+    hungarian_stopwords = set(stopwords.words("hungarian"))
+except OSError:
+    # Fallback if Hungarian stopwords are not available
+    hungarian_stopwords = set()
+
+NUM_PERM: int = 128
+# number of distinct words whose stems are kept in memory
+STEM_CACHE_SIZE: int = int(os.environ.get("STEM_CACHE_SIZE", "200000"))
+
+# after lowercasing, the words are the maximal runs of word characters
+word_pattern = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word: str) -> str:
+    """Memoized Hungarian Snowball stem of a lowercase word."""
+    return hungarian_stemmer.stem(word)
+
+
+def text_to_shingles(text: str, k: int = 1) -> set:
+    """Convert text to k-shingles (k-grams) for MinHash."""
+    # Remove stopwords and stem words
+    processed_words = [
+        stem(word)
+        for word in word_pattern.findall(text.lower())
+        if len(word) > 2 and word not in hungarian_stopwords
+    ]
+
+    if k == 1:
+        return set(processed_words)
+
+    # Create k-shingles
+    return {
+        " ".join(processed_words[i : i + k])
+        for i in range(len(processed_words) - k + 1)
+    }
+
+
+def create_minhash(text: str) -> MinHash:
+    """Create MinHash signature from text."""
+    return create_minhashes([text])[0]
+
+
+def create_minhashes(texts: Iterable[str]) -> list[MinHash]:
+    """
+    Creates the MinHash signatures of many texts at once. The permutations are generated once for
+    all texts and the shingles of each text are hashed with a single vectorized update.
+
+    Args:
+        texts: texts to create the signatures of
+
+    Returns:
+        List of MinHash signatures in the order of texts, the same as create_minhash of each text.
+    """
+    return MinHash.bulk(
+        (
+            [shingle.encode("utf-8") for shingle in text_to_shingles(text)]
+            for text in texts
+        ),
+        num_perm=NUM_PERM,
+    )
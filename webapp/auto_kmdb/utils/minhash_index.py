@@ -0,0 +1,187 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+from datasketch import MinHash, MinHashLSH
+
+# directory of the daily files of the index, one line per indexed article
+MINHASH_INDEX_DIR: str = os.environ.get("MINHASH_INDEX_DIR", "data/minhash_index")
+# number of days the daily files are kept on disk
+MINHASH_INDEX_KEEP_DAYS: int = int(os.environ.get("MINHASH_INDEX_KEEP_DAYS", "7"))
+# rows per LSH band, 1 finds every similar article, more rows return fewer unrelated candidates
+# but miss similar articles near the threshold, see benchmarks/minhash_lsh_params.py
+MINHASH_LSH_ROWS: int = int(os.environ.get("MINHASH_LSH_ROWS", "1"))
+
+
+class MinHashIndex:
+    """
+    Index of the MinHash signatures of the articles processed today, used to find the articles of
+    other newspapers about the same story.
+
+    Candidates are looked up in a MinHashLSH, then verified with the Jaccard similarity of the
+    signatures. By default every band is a single row, so practically every article from the
+    similarity threshold up is a candidate. More rows per band are lossy: with 2 rows an unrelated
+    article (Jaccard ~0.05) is a candidate with a probability of ~15% instead of most of the day,
+    but similar articles are only found with a probability of ~78% at a Jaccard of 0.15, ~95% at
+    0.2 and >99.7% from 0.3. Only the current day is held in memory, every added article is also
+    appended to the file of the day, which is loaded again after a restart.
+
+    Args:
+        threshold: minimum Jaccard similarity of the query results by default
+        num_perm: number of permutations of the signatures
+        directory: directory of the daily files
+        keep_days: number of days the daily files are kept
+        rows: rows per LSH band, the signatures are split into num_perm // rows bands
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        num_perm: int = 128,
+        directory: str = MINHASH_INDEX_DIR,
+        keep_days: int = MINHASH_INDEX_KEEP_DAYS,
+        rows: int = MINHASH_LSH_ROWS,
+    ) -> None:
+        self.threshold: float = threshold
+        self.num_perm: int = num_perm
+        self.rows: int = rows
+        self.directory: str = directory
+        self.keep_days: int = keep_days
+        self._lock = threading.Lock()
+        self._day: Optional[str] = None
+        self._lsh: MinHashLSH
+        # id -> {"minhash": ..., "domain": ..., "seq": ...}, seq keeps the insertion order
+        self._entries: dict[int, dict] = {}
+        self._seq: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{day}.jsonl")
+
+    def _switch_day(self) -> None:
+        day: str = datetime.now().strftime("%Y-%m-%d")
+        if day == self._day:
+            return
+        self._day = day
+        self._lsh = MinHashLSH(
+            num_perm=self.num_perm, params=(self.num_perm // self.rows, self.rows)
+        )
+        self._entries = {}
+        self._load(day)
+        self._evict_old_days(day)
+
+    def _load(self, day: str) -> None:
+        path: str = self._path(day)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry: dict = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line of a crashed process may be partial
+                    logging.warning(f"skipping invalid line in {path}")
+                    continue
+                minhash = MinHash(
+                    num_perm=self.num_perm,
+                    hashvalues=np.array(entry["hashvalues"], dtype=np.uint64),
+                )
+                self._insert(entry["id"], minhash, entry["domain"])
+        logging.info(f"loaded {len(self._entries)} articles into the minhash index")
+
+    def _evict_old_days(self, day: str) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        oldest: date = datetime.strptime(day, "%Y-%m-%d").date() - timedelta(
+            days=self.keep_days
+        )
+        for file_name in os.listdir(self.directory):
+            try:
+                file_day: date = datetime.strptime(
+                    file_name.removesuffix(".jsonl"), "%Y-%m-%d"
+                ).date()
+            except ValueError:
+                continue
+            if file_day < oldest:
+                os.remove(os.path.join(self.directory, file_name))
+
+    def _insert(self, autokmdb_id: int, minhash: MinHash, domain: str) -> None:
+        if autokmdb_id in self._entries:
+            self._lsh.remove(autokmdb_id)
+        self._lsh.insert(autokmdb_id, minhash)
+        self._entries[autokmdb_id] = {
+            "minhash": minhash,
+            "domain": domain,
+            "seq": self._seq,
+        }
+        self._seq += 1
+
+    def add(self, autokmdb_id: int, minhash: MinHash, domain: str) -> None:
+        """
+        Adds an article to the index of today and to the file of the day.
+
+        Args:
+            autokmdb_id: id of the article
+            minhash: MinHash signature of the article
+            domain: domain of the article, articles of the same domain are not matched
+        """
+        with self._lock:
+            self._switch_day()
+            self._insert(autokmdb_id, minhash, domain)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(self._day), "a", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        {
+                            "id": autokmdb_id,
+                            "domain": domain,
+                            "hashvalues": minhash.hashvalues.tolist(),
+                        }
+                    )
+                    + "\n"
+                )
+
+    def query(
+        self,
+        minhash: MinHash,
+        domain: str,
+        threshold: Optional[float] = None,
+        limit: int = 10,
+    ) -> list[tuple[int, float]]:
+        """
+        Finds the articles of today similar to the given signature.
+
+        Args:
+            minhash: MinHash signature of the article
+            domain: domain of the article, articles of the same domain are skipped, no articles
+                are skipped if empty
+            threshold: minimum Jaccard similarity, defaults to the threshold of the index
+            limit: maximum number of results
+
+        Returns:
+            List of (id, distance) tuples sorted by distance (1 - similarity), ties in the order
+            the articles were added.
+        """
+        if threshold is None:
+            threshold = self.threshold
+        with self._lock:
+            self._switch_day()
+            similar_articles: list[tuple[float, int, int]] = []
+            for autokmdb_id in self._lsh.query(minhash):
+                entry: dict = self._entries[autokmdb_id]
+                if domain and entry["domain"] == domain:
+                    continue
+                similarity: float = minhash.jaccard(entry["minhash"])
+                if similarity >= threshold:
+                    similar_articles.append((1 - similarity, entry["seq"], autokmdb_id))
+        similar_articles.sort()
+        return [
+            (autokmdb_id, distance)
+            for distance, _, autokmdb_id in similar_articles[:limit]
+        ]
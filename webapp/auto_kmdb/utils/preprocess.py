@@ -1,4 +1,5 @@
 import re
+from typing import Callable
 from urllib.parse import urlparse
 
 
@@ -50,12 +51,40 @@ def do_replacements(text, replacements):
     return text
 
 
+def normalize_text(text: str) -> str:
+    """
+    Applies the replacements of the replacements list in the same order, skipping the rules that
+    can't change the text. The output is identical to do_replacements(text, replacements).
+
+    Args:
+        text: text to normalize
+
+    Returns:
+        The normalized text.
+    """
+    for applies, pattern, replacement in normalization_rules:
+        if applies(text):
+            text = pattern.sub(replacement, text)
+    return text
+
+
 def trim_title(title):
     for name in title_papers:
         title = title.replace(name, "")
     return title
 
 
+def remove_common_descriptions(description: str) -> str:
+    """
+    Removes the common descriptions of data/common_descriptions.txt from a description.
+    """
+    if not common_descriptions_pattern.search(description):
+        return description
+    for common_description in common_descriptions:
+        description = description.replace(common_description.strip(), "")
+    return description
+
+
 common_descriptions = read_file("data/common_descriptions.txt")
 common_lines = read_file("data/common_lines.txt")
 
@@ -115,6 +144,14 @@ title_papers = [
     "SZON - ",
 ]
 
+common_descriptions_pattern = re.compile(
+    "|".join(
+        re.escape(common_description.strip())
+        for common_description in common_descriptions
+        if common_description.strip()
+    )
+)
+
 replacements = [
     (picture_pattern, ""),
     (quote_pattern, '"'),
@@ -125,3 +162,18 @@ replacements = [
     (photo_camera_pattern, ""),
     (newline_pattern, "\n\n"),
 ]
+
+# The rules of replacements, each with a cheap check that is true whenever the rule could change
+# the text. line_pattern is not multiline, so it only matches texts of a single line; scanning
+# every position of a long text for it took most of the time of do_replacements.
+normalization_rules: list[tuple[Callable[[str], bool], re.Pattern, str]] = [
+    (lambda text: "Fotó: " in text, picture_pattern, ""),
+    (lambda text: "”" in text or "“" in text or "„" in text, quote_pattern, '"'),
+    (lambda text: "…" in text, dot_pattern, "..."),
+    (lambda text: "\n" not in text[:-1], line_pattern, ""),
+    (lambda text: "  " in text, space_pattern, " "),
+    (lambda text: "–" in text, dash_pattern, "-"),
+    (lambda text: "photo_camer" in text, photo_camera_pattern, ""),
+    # runs of exactly two newlines are replaced by themselves
+    (lambda text: "\n\n\n" in text, newline_pattern, "\n\n"),
+]
@@ -1,6 +1,8 @@
 from itertools import product
 from typing import Optional
 
+import ahocorasick
+
 # newspapers and their IDs
 newspapers: list[dict[str, str | Optional[int]]] = [
     {"name": "444", "id": 122},
@@ -197,6 +199,41 @@ products: list[str] = [
 ]
 
 
+# id of the first newspaper (in the order of newspapers) whose name occurs in the phrase
+def phrase_newspaper_id(sent: str) -> Optional[int]:
+    for n in newspapers:
+        if n["name"] in sent:
+            return n["id"]
+    return None
+
+
+# id of each cleaned newspaper name, the first one in newspapers wins
+news_name_ids: dict[str, Optional[int]] = {}
+for n in newspapers:
+    news_name_ids.setdefault(n["name"], n["id"])
+
+# Automaton of all phrases, each carrying its position in products and its newspaper id, so a
+# single pass over a text finds every phrase in it
+phrase_automaton = ahocorasick.Automaton()
+for index, sent in enumerate(products):
+    if sent not in phrase_automaton:
+        phrase_automaton.add_word(sent, (index, phrase_newspaper_id(sent)))
+phrase_automaton.make_automaton()
+
+
+def first_phrase_match(
+    text: str, match: Optional[tuple[int, Optional[int]]]
+) -> Optional[tuple[int, Optional[int]]]:
+    """
+    Returns the (index, newspaper id) of the phrase of the text that comes first in products, or
+    match if that comes earlier.
+    """
+    for _, found in phrase_automaton.iter(text):
+        if match is None or found[0] < match[0]:
+            match = found
+    return match
+
+
 # Function to check if a piece of text ends with the format of "(news_name)"
 def check_ends_with(text: str, news_name: str) -> bool:
     return text.endswith(f"({news_name})")
@@ -209,16 +246,14 @@ def same_news(title: str, description: str, text: str) -> Optional[int]:
     text = clean(text)
 
     if ":" in title and title.split(":")[0] in news_names_set:
-        title_prefix = title.split(":")[0]
-        for n in newspapers:
-            if n["name"] == title_prefix:
-                return n["id"]
+        return news_name_ids[title.split(":")[0]]
 
-    for sent in products:
-        if sent in description or sent in text:
-            for n in newspapers:
-                if n["name"] in sent:
-                    return n["id"]
+    # the first phrase of products found in the description or the text decides
+    match: Optional[tuple[int, Optional[int]]] = first_phrase_match(
+        text, first_phrase_match(description, None)
+    )
+    if match is not None:
+        return match[1]
 
     if text.endswith(")"):
         for n in newspapers:
@@ -0,0 +1,238 @@
+from datetime import datetime
+from hashlib import sha1
+from typing import Any, Iterable, Optional
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+
+# search backend of the article list: "fts5" for the local SQLite index, "like" for LIKE queries
+SEARCH_BACKEND: str = os.environ.get("SEARCH_BACKEND", "fts5")
+# directory of the SQLite full-text index of the articles
+SEARCH_INDEX_DIR: str = os.environ.get("SEARCH_INDEX_DIR", "data/search_index")
+# searches matching more articles fall back to LIKE, keeping the id lists of the queries bounded
+SEARCH_MAX_IDS: int = int(os.environ.get("SEARCH_MAX_IDS", "5000"))
+# the trigram tokenizer can only look up searches of at least 3 characters
+MIN_QUERY_LENGTH: int = 3
+# version of the tables, an index of another version is rebuilt
+SCHEMA_VERSION: str = "3"
+
+
+def fold(text: Optional[str]) -> str:
+    """
+    Lowercases the text and removes its accents, a superset of the equalities of the
+    utf8_general_ci collation, so every LIKE match in MySQL is a substring match of the folded
+    texts.
+    """
+    if not text:
+        return ""
+    decomposed: str = unicodedata.normalize("NFKD", text.lower().replace("ß", "s"))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def to_match_query(query: str) -> Optional[str]:
+    """
+    Returns the FTS5 query of the articles containing the search as a substring, None if the
+    index can't answer it: the search is too short or contains the wildcards of LIKE.
+    """
+    if any(char in query for char in "%_\\"):
+        return None
+    folded: str = fold(query)
+    if len(folded) < MIN_QUERY_LENGTH:
+        return None
+    return '"' + folded.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """
+    Substring index of the title, description and source url of the articles, in a local SQLite
+    FTS5 database with the trigram tokenizer. It answers the ids of the articles that may match a
+    search within the domain and date filters: the texts are folded (see fold), so the ids are a
+    superset of the LIKE matches. MySQL applies the LIKE search to these ids and to the articles
+    modified since the index was last synced (see synced_mod_time), so the results are the same as
+    without the index.
+
+    The index is filled by search_indexer, which first loads all articles in batches and then
+    polls the articles modified since the last one it indexed. Until the first load is complete, searches
+    are answered by LIKE.
+
+    Args:
+        directory: directory of the index database
+    """
+
+    def __init__(self, directory: str = SEARCH_INDEX_DIR) -> None:
+        self.directory: str = directory
+        self._local = threading.local()
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            if self.get_meta("version") != SCHEMA_VERSION:
+                connection.execute("DROP TABLE IF EXISTS news_fts")
+                connection.execute("DROP TABLE IF EXISTS docs")
+                connection.execute("DELETE FROM meta")
+                connection.execute(
+                    "INSERT INTO meta (key, value) VALUES ('version', ?)", (SCHEMA_VERSION,)
+                )
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(title, description, source_url, tokenize='trigram')"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, newspaper_id INTEGER, article_date TEXT, hash TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads
+        if getattr(self._local, "connection", None) is None:
+            self._local.connection = sqlite3.connect(
+                os.path.join(self.directory, "index.sqlite"), timeout=30
+            )
+        return self._local.connection
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row: Optional[tuple] = (
+            self._connect()
+            .execute("SELECT value FROM meta WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set_meta(self, values: dict[str, Any]) -> None:
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()],
+            )
+
+    @property
+    def complete(self) -> bool:
+        """Whether all articles have been loaded, searches are only answered after that."""
+        return self.get_meta("complete") == "1"
+
+    @property
+    def synced_mod_time(self) -> Optional[str]:
+        """
+        The mod_time (YYYY-MM-DD HH:MM:SS) the changes are indexed up to, articles modified at or
+        after it may be missing or outdated in the index.
+        """
+        return self.get_meta("synced_mod_time")
+
+    def add(self, articles: Iterable[dict]) -> int:
+        """
+        Indexes articles, replacing their previous versions. Articles whose indexed fields didn't
+        change are skipped, most changes of an article are steps of the pipeline.
+
+        Args:
+            articles: dicts with the id, title, description, source_url, newspaper_id and
+                article_date of the articles
+
+        Returns:
+            The number of indexed articles.
+        """
+        count: int = 0
+        with self._connect() as connection:
+            for article in articles:
+                date: Optional[datetime] = article["article_date"]
+                str_date: Optional[str] = date.strftime("%Y-%m-%d %H:%M:%S") if date else None
+                hash: str = sha1(
+                    repr(
+                        (
+                            article["title"],
+                            article["description"],
+                            article["source_url"],
+                            article["newspaper_id"],
+                            str_date,
+                        )
+                    ).encode()
+                ).hexdigest()
+                row: Optional[tuple] = connection.execute(
+                    "SELECT hash FROM docs WHERE id = ?", (article["id"],)
+                ).fetchone()
+                if row is not None and row[0] == hash:
+                    continue
+                connection.execute("DELETE FROM news_fts WHERE rowid = ?", (article["id"],))
+                connection.execute(
+                    "INSERT INTO news_fts (rowid, title, description, source_url) VALUES (?, ?, ?, ?)",
+                    (
+                        article["id"],
+                        fold(article["title"]),
+                        fold(article["description"]),
+                        fold(article["source_url"]),
+                    ),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO docs (id, newspaper_id, article_date, hash) VALUES (?, ?, ?, ?)",
+                    (article["id"], article["newspaper_id"], str_date, hash),
+                )
+                count += 1
+        return count
+
+    def search(
+        self,
+        query: str,
+        domains: Optional[list[int]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = SEARCH_MAX_IDS,
+    ) -> Optional[list[int]]:
+        """
+        Returns the ids of the articles that may contain the search in their title, description or
+        source url.
+
+        Args:
+            query: search words, as entered
+            domains: only articles of these newspapers, optional
+            start: only articles published at or after this time (YYYY-MM-DD HH:MM:SS), optional
+            end: only articles published at or before this time (YYYY-MM-DD HH:MM:SS), optional
+            limit: maximum number of ids
+
+        Returns:
+            List of article ids, None if the search must be done with LIKE alone: the index is not
+            complete, the query is too short for the index or more than limit articles match.
+        """
+        match_query: Optional[str] = to_match_query(query)
+        if match_query is None or not self.complete:
+            return None
+        conditions: list[str] = ["news_fts MATCH ?"]
+        params: list[Any] = [match_query]
+        if start is not None and end is not None:
+            conditions.append("d.article_date BETWEEN ? AND ?")
+            params += [start, end]
+        if domains:
+            conditions.append(f"d.newspaper_id IN ({', '.join(['?'] * len(domains))})")
+            params += domains
+        rows: list[tuple] = (
+            self._connect()
+            .execute(
+                f"""SELECT d.id FROM news_fts JOIN docs d ON d.id = news_fts.rowid
+                WHERE {" AND ".join(conditions)} LIMIT ?""",
+                params + [limit + 1],
+            )
+            .fetchall()
+        )
+        if len(rows) > limit:
+            return None
+        return [row[0] for row in rows]
+
+
+search_index: Optional[SearchIndex] = None
+search_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """
+    Returns the search index shared by the whole process, None if searches are done with LIKE,
+    because of SEARCH_BACKEND or because this SQLite has no FTS5 trigram tokenizer (3.34+).
+    """
+    global search_index, SEARCH_BACKEND
+    with search_index_lock:
+        if search_index is None and SEARCH_BACKEND == "fts5":
+            try:
+                search_index = SearchIndex()
+            except sqlite3.OperationalError as e:
+                logging.error(f"Search index is not available, using LIKE: {e}")
+                SEARCH_BACKEND = "like"
+        return search_index
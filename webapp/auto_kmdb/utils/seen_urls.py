@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from typing import Iterable
+import threading
+
+
+class SeenUrls:
+    """
+    Bounded, thread-safe set of recently seen clean urls. When full, the urls that were seen the
+    longest time ago are forgotten first, so the urls still present in the feeds stay known.
+
+    Args:
+        max_size: maximum number of urls kept in memory
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size: int = max_size
+        self._urls: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return url in self._urls
+
+    def update(self, urls: Iterable[str]) -> None:
+        """Marks the urls as seen, evicting the least recently seen urls over max_size."""
+        with self._lock:
+            for url in urls:
+                self._urls[url] = None
+                self._urls.move_to_end(url)
+            while len(self._urls) > self.max_size:
+                self._urls.popitem(last=False)
+
+    def unseen(self, urls: Iterable[str]) -> list[str]:
+        """
+        Returns the urls that are not known, in their original order. The known urls are marked
+        as seen again, so urls that stay in a feed are not evicted.
+        """
+        result: list[str] = []
+        with self._lock:
+            for url in urls:
+                if url in self._urls:
+                    self._urls.move_to_end(url)
+                else:
+                    result.append(url)
+        return result
@@ -0,0 +1,52 @@
+from threading import Event
+import logging
+import os
+
+# Processors still poll the database every POLL_INTERVAL seconds, in case a row has been moved to
+# their step by another process (e.g. a second worker or a manual database edit).
+POLL_INTERVAL: float = float(os.environ.get("POLL_INTERVAL", "60"))
+
+_events: dict[int, Event] = {}
+
+
+def _get_event(step: int) -> Event:
+    # dict.setdefault is atomic, so concurrent callers always share the same Event
+    return _events.setdefault(step, Event())
+
+
+def notify_step(step: int) -> None:
+    """
+    Signals that at least one article has been moved to the given processing_step.
+
+    Args:
+        step: the processing_step the articles have been moved to
+    """
+    _get_event(step).set()
+
+
+def clear_step(step: int) -> None:
+    """
+    Marks all pending notifications of the given processing_step as seen. Must be called before
+    querying the queue of the step, so notifications arriving during processing are not lost.
+
+    Args:
+        step: the processing_step of the queue that is about to be queried
+    """
+    _get_event(step).clear()
+
+
+def wait_for_step(step: int, timeout: float = POLL_INTERVAL) -> bool:
+    """
+    Blocks until an article is moved to the given processing_step or the timeout expires.
+
+    Args:
+        step: the processing_step to wait for
+        timeout: maximum number of seconds to wait, after which the queue is polled anyway
+
+    Returns:
+        True if woken up by a notification, False on timeout.
+    """
+    notified: bool = _get_event(step).wait(timeout)
+    if not notified:
+        logging.debug(f"no notification for step {step}, polling database")
+    return notified
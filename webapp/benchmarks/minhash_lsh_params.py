@@ -0,0 +1,150 @@
+"""
+Measures the trade-off of the LSH band/row split of the minhash index in
+auto_kmdb/utils/minhash_index.py: the number of candidates a query returns from a day of unrelated
+articles (each of them is verified with the Jaccard similarity of the signatures), against the
+share of similar articles found at the Jaccard similarities around the threshold.
+
+Similar articles are planted by replacing part of the shingles of an article, so their similarity
+is known. The day articles are the shingle sets of real texts, or without --input synthetic sets
+whose pairs have a Jaccard similarity of about --unrelated-jaccard.
+
+Usage (from the webapp directory):
+    python benchmarks/minhash_lsh_params.py [--input data.jsonl(.gz)] [--sample 2000]
+        [--queries 300] [--unrelated-jaccard 0.05]
+
+An input file must contain json lines with 'title', 'description' and 'text' fields.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auto_kmdb", "utils"))
+
+from datasketch import MinHash, MinHashLSH  # noqa: E402
+import minhash  # noqa: E402
+
+PLANTED_JACCARDS: list[float] = [0.15, 0.2, 0.3, 0.5]
+THRESHOLD: float = 0.15
+
+
+def load_shingles(path: str, sample: int) -> list[set]:
+    opener = gzip.open if path.endswith(".gz") else open
+    sets: list[set] = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            row: dict = json.loads(line)
+            shingles: set = minhash.text_to_shingles(
+                f"{row.get('title')}\n{row.get('description')}\n{row.get('text')}"
+            )
+            if len(shingles) >= 20:
+                sets.append(shingles)
+            if len(sets) >= sample:
+                break
+    return sets
+
+
+def synthetic_shingles(count: int, jaccard: float, generator: random.Random) -> list[set]:
+    # every set has `common` words of a shared pool and unique words, two sets share
+    # common^2 / pool words on average
+    size: int = 300
+    shared: float = 2 * size * jaccard / (1 + jaccard)
+    common: int = 150
+    pool: int = max(common, int(common * common / shared))
+    sets: list[set] = []
+    for i in range(count):
+        words: set = {f"w{w}" for w in generator.sample(range(pool), common)}
+        words |= {f"u{i}_{w}" for w in range(size - common)}
+        sets.append(words)
+    return sets
+
+
+def plant(shingles: set, jaccard: float, generator: random.Random, tag: str) -> set:
+    """Returns a set with the given Jaccard similarity to shingles, of the same size."""
+    size: int = len(shingles)
+    shared: int = round(2 * size * jaccard / (1 + jaccard))
+    kept: list = generator.sample(sorted(shingles), shared)
+    return set(kept) | {f"{tag}_{i}" for i in range(size - shared)}
+
+
+def signature(shingles: set) -> MinHash:
+    m = MinHash(num_perm=minhash.NUM_PERM)
+    m.update_batch([shingle.encode("utf-8") for shingle in shingles])
+    return m
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=None)
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--unrelated-jaccard", type=float, default=0.05)
+    args = parser.parse_args()
+
+    generator = random.Random(42)
+    if args.input:
+        day_sets: list[set] = load_shingles(args.input, args.sample)
+    else:
+        day_sets = synthetic_shingles(args.sample, args.unrelated_jaccard, generator)
+    day: list[MinHash] = [signature(s) for s in day_sets]
+
+    pairs: list[tuple[int, int]] = [
+        tuple(generator.sample(range(len(day)), 2)) for _ in range(2000)
+    ]
+    jaccards: list[float] = sorted(day[a].jaccard(day[b]) for a, b in pairs)
+    print(
+        f"{len(day)} day articles, Jaccard of unrelated pairs: "
+        f"median {jaccards[len(jaccards) // 2]:.3f}, p95 {jaccards[int(len(jaccards) * 0.95)]:.3f}"
+    )
+
+    query_ids: list[int] = generator.sample(range(len(day)), min(args.queries, len(day)))
+    planted: dict[float, list[tuple[int, MinHash]]] = {
+        jaccard: [
+            (i, signature(plant(day_sets[i], jaccard, generator, f"p{i}")))
+            for i in query_ids
+        ]
+        for jaccard in PLANTED_JACCARDS
+    }
+
+    configs: list[tuple[str, MinHashLSH]] = [
+        (
+            "weights (0.01, 0.99)",
+            MinHashLSH(threshold=THRESHOLD, num_perm=minhash.NUM_PERM, weights=(0.01, 0.99)),
+        ),
+        (
+            "weights (0.5, 0.5)",
+            MinHashLSH(threshold=THRESHOLD, num_perm=minhash.NUM_PERM),
+        ),
+    ]
+    for rows in [1, 2, 3, 4]:
+        bands: int = minhash.NUM_PERM // rows
+        configs.append(
+            (f"rows {rows}", MinHashLSH(num_perm=minhash.NUM_PERM, params=(bands, rows)))
+        )
+
+    print(
+        f"{'config':<22}{'b':>4}{'r':>3}{'candidates/query':>18}"
+        + "".join(f"{f'recall@{j}':>13}" for j in PLANTED_JACCARDS)
+    )
+    for name, lsh in configs:
+        for i, m in enumerate(day):
+            lsh.insert(i, m)
+        # the planted article itself is the one to find, the other candidates are unrelated
+        candidates: float = sum(
+            len(lsh.query(m)) - 1 for _, m in planted[PLANTED_JACCARDS[-1]]
+        ) / len(query_ids)
+        recalls: list[float] = [
+            sum(i in lsh.query(m) for i, m in planted[jaccard]) / len(query_ids)
+            for jaccard in PLANTED_JACCARDS
+        ]
+        print(
+            f"{name:<22}{lsh.b:>4}{lsh.r:>3}{candidates:>18.1f}"
+            + "".join(f"{recall:>13.3f}" for recall in recalls)
+        )
+
+
+if __name__ == "__main__":
+    main()
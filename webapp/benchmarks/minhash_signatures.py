@@ -0,0 +1,107 @@
+"""
+Compares the MinHash signatures of the per-word implementation used before the batched builder in
+auto_kmdb/utils/minhash.py, on a sample of real article texts, for equality and speed.
+
+Usage (from the webapp directory):
+    python benchmarks/minhash_signatures.py [--input data.jsonl(.gz)] [--sample 2000]
+
+Without --input the texts of the K-Monitor/kmdb_classification dataset are used, an input file
+must contain json lines with 'title', 'description' and 'text' fields.
+"""
+
+from time import perf_counter
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auto_kmdb", "utils"))
+
+from datasketch import MinHash  # noqa: E402
+import minhash  # noqa: E402
+
+
+def text_to_shingles_old(text: str, k: int = 1) -> set:
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    text = re.sub(r"\s+", " ", text.strip())
+    words = text.split()
+
+    processed_words = []
+    for word in words:
+        if word not in minhash.hungarian_stopwords and len(word) > 2:
+            stemmed_word = minhash.hungarian_stemmer.stem(word)
+            processed_words.append(stemmed_word)
+
+    shingles = set()
+    for i in range(len(processed_words) - k + 1):
+        shingle = " ".join(processed_words[i : i + k])
+        shingles.add(shingle)
+
+    return shingles
+
+
+def create_minhash_old(text: str) -> MinHash:
+    shingles = text_to_shingles_old(text)
+    signature = MinHash(num_perm=128)
+    for shingle in shingles:
+        signature.update(shingle.encode("utf-8"))
+    return signature
+
+
+def load_texts(path: str | None, sample: int) -> list[str]:
+    rows: list[dict] = []
+    if path is None:
+        from datasets import load_dataset
+
+        dataset = load_dataset("K-Monitor/kmdb_classification", split="train")
+        rows = list(dataset.shuffle(seed=42).select(range(min(sample, len(dataset)))))
+    else:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                rows.append(json.loads(line))
+                if len(rows) >= sample:
+                    break
+    return [
+        f"{row.get('title')}\n{row.get('description')}\n{row.get('text')}"
+        for row in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=None)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    texts: list[str] = load_texts(args.input, args.sample)
+    print(f"{len(texts)} texts, {sum(len(t) for t in texts) / 1e6:.1f}M characters")
+
+    start = perf_counter()
+    old = [create_minhash_old(text) for text in texts]
+    old_time = perf_counter() - start
+
+    minhash.stem.cache_clear()
+    start = perf_counter()
+    new = minhash.create_minhashes(texts)
+    new_time = perf_counter() - start
+
+    # the stem cache is warm in production, measured separately
+    start = perf_counter()
+    minhash.create_minhashes(texts)
+    warm_time = perf_counter() - start
+
+    mismatches = sum(
+        (a.hashvalues != b.hashvalues).any() for a, b in zip(old, new)
+    )
+    print(f"signature mismatches: {mismatches}")
+    print(f"old:            {old_time:.2f}s")
+    print(f"new (cold):     {new_time:.2f}s ({old_time / new_time:.1f}x)")
+    print(f"new (warm):     {warm_time:.2f}s ({old_time / warm_time:.1f}x)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Regression check of the text normalization in auto_kmdb/utils/preprocess.py: normalize_text and
+remove_common_descriptions must give byte-identical output to the sequential replacements used
+before, on a corpus of real article texts and on generated edge cases. Also reports the speed of
+both.
+
+Usage (from the webapp directory):
+    python benchmarks/preprocess_normalization.py [--input data.jsonl(.gz)] [--sample 2000]
+
+Without --input the texts of the K-Monitor/kmdb_classification dataset are used, an input file
+must contain json lines with 'title', 'description' and 'text' fields.
+"""
+
+from time import perf_counter
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auto_kmdb", "utils"))
+
+import preprocess  # noqa: E402
+
+
+def normalize_text_old(text: str) -> str:
+    return preprocess.do_replacements(text, preprocess.replacements)
+
+
+def remove_common_descriptions_old(description: str) -> str:
+    for common_description in preprocess.common_descriptions:
+        description = description.replace(common_description.strip(), "")
+    return description
+
+
+def load_rows(path: str | None, sample: int) -> list[dict]:
+    rows: list[dict] = []
+    if path is None:
+        from datasets import load_dataset
+
+        dataset = load_dataset("K-Monitor/kmdb_classification", split="train")
+        rows = list(dataset.shuffle(seed=42).select(range(min(sample, len(dataset)))))
+    else:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                rows.append(json.loads(line))
+                if len(rows) >= sample:
+                    break
+    return [
+        {
+            "title": row.get("title") or "",
+            "description": row.get("description") or "",
+            "text": row.get("text") or "",
+        }
+        for row in rows
+    ]
+
+
+# fragments touching every rule, and the interactions between them
+EDGE_FRAGMENTS: list[str] = [
+    "Fotó: MTI/Koszticsák Szilárd",
+    "Fotó: ",
+    "Fotó:",
+    "photo_camera",
+    "photo_camer",
+    "photo_cameraaa",
+    "  ",
+    "   ",
+    " ",
+    "\n",
+    "\n\n",
+    "\n\n\n",
+    "„",
+    "”",
+    "“",
+    "…",
+    "–",
+    "Szerző: Kovács Péter",
+    "Címkék: politika",
+    "Kiemelt kép: MTI",
+    "2024. május 12., vasárnap, 10:15 • ",
+    "szöveg",
+    "a",
+]
+
+
+def edge_cases(count: int) -> list[str]:
+    generator = random.Random(42)
+    cases: list[str] = list(EDGE_FRAGMENTS)
+    for _ in range(count):
+        cases.append(
+            "".join(
+                generator.choice(EDGE_FRAGMENTS)
+                for _ in range(generator.randint(1, 8))
+            )
+        )
+    return cases
+
+
+def compare(name: str, old, new, texts: list[str]) -> int:
+    start = perf_counter()
+    old_results = [old(text) for text in texts]
+    old_time = perf_counter() - start
+
+    start = perf_counter()
+    new_results = [new(text) for text in texts]
+    new_time = perf_counter() - start
+
+    mismatches = [
+        text for text, a, b in zip(texts, old_results, new_results) if a != b
+    ]
+    print(
+        f"{name:<27} mismatches: {len(mismatches):>5}   old: {old_time:.3f}s   "
+        f"new: {new_time:.3f}s ({old_time / new_time if new_time else 0:.1f}x)"
+    )
+    for text in mismatches[:3]:
+        print(f"    {text!r}")
+    return len(mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=None)
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--edge-cases", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows: list[dict] = load_rows(args.input, args.sample)
+    print(f"{len(rows)} articles, {sum(len(r['text']) for r in rows) / 1e6:.1f}M characters")
+    titles: list[str] = [row["title"] for row in rows]
+    descriptions: list[str] = [row["description"] for row in rows]
+    texts: list[str] = [row["text"] for row in rows]
+    edges: list[str] = edge_cases(args.edge_cases)
+
+    mismatches: int = 0
+    mismatches += compare("text", normalize_text_old, preprocess.normalize_text, texts)
+    mismatches += compare("title", normalize_text_old, preprocess.normalize_text, titles)
+    mismatches += compare(
+        "common descriptions",
+        remove_common_descriptions_old,
+        preprocess.remove_common_descriptions,
+        descriptions,
+    )
+    mismatches += compare(
+        "edge cases", normalize_text_old, preprocess.normalize_text, edges
+    )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
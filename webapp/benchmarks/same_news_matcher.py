@@ -0,0 +1,106 @@
+"""
+Compares the phrase scan used before the Aho-Corasick automaton in auto_kmdb/utils/same_news.py
+with the current same_news, on a sample of real article texts, for equal results and speed.
+
+Usage (from the webapp directory):
+    python benchmarks/same_news_matcher.py [--input data.jsonl(.gz)] [--sample 2000]
+
+Without --input the texts of the K-Monitor/kmdb_classification dataset are used, an input file
+must contain json lines with 'title', 'description' and 'text' fields.
+"""
+
+from time import perf_counter
+from typing import Optional
+import argparse
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "auto_kmdb", "utils"))
+
+import same_news  # noqa: E402
+
+
+def same_news_old(title: str, description: str, text: str) -> Optional[int]:
+    title = same_news.clean(title)
+    description = same_news.clean(description)
+    text = same_news.clean(text)
+
+    if ":" in title and title.split(":")[0] in same_news.news_names_set:
+        title_prefix = title.split(":")[0]
+        for n in same_news.newspapers:
+            if n["name"] == title_prefix:
+                return n["id"]
+
+    for sent in same_news.products:
+        if sent in description or sent in text:
+            for n in same_news.newspapers:
+                if n["name"] in sent:
+                    return n["id"]
+
+    if text.endswith(")"):
+        for n in same_news.newspapers:
+            if same_news.check_ends_with(text, n["name"]):
+                return n["id"]
+
+    return None
+
+
+def load_rows(path: str | None, sample: int) -> list[dict]:
+    rows: list[dict] = []
+    if path is None:
+        from datasets import load_dataset
+
+        dataset = load_dataset("K-Monitor/kmdb_classification", split="train")
+        rows = list(dataset.shuffle(seed=42).select(range(min(sample, len(dataset)))))
+    else:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                rows.append(json.loads(line))
+                if len(rows) >= sample:
+                    break
+    return [
+        {
+            "title": row.get("title") or "",
+            "description": row.get("description") or "",
+            "text": row.get("text") or "",
+        }
+        for row in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=None)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows: list[dict] = load_rows(args.input, args.sample)
+    print(
+        f"{len(rows)} articles, {len(same_news.products)} phrases, "
+        f"{sum(len(r['text']) for r in rows) / 1e6:.1f}M characters"
+    )
+
+    start = perf_counter()
+    old = [same_news_old(**row) for row in rows]
+    old_time = perf_counter() - start
+
+    start = perf_counter()
+    new = [same_news.same_news(**row) for row in rows]
+    new_time = perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(old, new))
+    print(f"articles with a same news id: {sum(a is not None for a in old)}")
+    print(f"mismatches: {mismatches}")
+    print(f"old: {old_time:.2f}s ({1000 * old_time / len(rows):.2f} ms/article)")
+    print(
+        f"new: {new_time:.2f}s ({1000 * new_time / len(rows):.2f} ms/article, "
+        f"{old_time / new_time:.1f}x)"
+    )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()